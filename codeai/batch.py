@@ -0,0 +1,158 @@
+import os
+import json
+import time
+from codeai.conversation_manager import initialize_conversation, get_current_turn, save_response, read_draft_message
+from codeai.output import log, emit_event
+from codeai.messaging import montar_conversa
+
+LOTES_DIR = 'lotes'
+BATCH_ENDPOINT = '/v1/chat/completions'
+STATUS_FINAIS = ('completed', 'failed', 'expired', 'cancelled')
+PROMPT_EXTENSIONS = ('.md', '.txt')
+
+def load_prompts(source):
+    """Lê os prompts de um diretório (um arquivo .md/.txt por prompt) ou de um arquivo JSONL.
+
+    Cada linha do JSONL tem 'mensagem' e, opcionalmente, 'id' e 'raiz' (projeto cuja conversa recebe a resposta).
+    """
+    prompts = []
+    if os.path.isdir(source):
+        for file_name in sorted(os.listdir(source)):
+            if os.path.splitext(file_name)[1] not in PROMPT_EXTENSIONS:
+                continue
+            with open(os.path.join(source, file_name), 'r', encoding='utf-8') as f:
+                prompts.append({'id': os.path.splitext(file_name)[0], 'mensagem': f.read()})
+        return prompts
+
+    with open(source, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if 'mensagem' not in entry:
+                raise ValueError(f"Linha {line_number} de {source} não possui o campo 'mensagem'.")
+            entry.setdefault('id', str(line_number))
+            prompts.append(entry)
+    return prompts
+
+
+def build_batch_requests(prompts, default_root):
+    """Monta uma requisição do lote por prompt, com o contexto e o histórico de cada projeto.
+
+    A conversa de cada projeto é montada uma única vez e reaproveitada pelos prompts do mesmo projeto.
+    Retorna (linhas do JSONL do lote, destinos com o projeto e o prompt de cada requisição).
+    """
+    conversations = {}
+    requests, targets = [], []
+    for index, prompt in enumerate(prompts):
+        root_dir = os.path.abspath(prompt.get('raiz') or default_root)
+        if root_dir not in conversations:
+            conversations[root_dir] = montar_conversa(root_dir)
+        conversation, _, _, config = conversations[root_dir]
+
+        model = config.modelo
+        if model.startswith('gemini'):
+            raise ValueError(f"O modo lote usa a Batch API da OpenAI; o projeto {root_dir} está configurado com {model}.")
+
+        # A mensagem atual é substituída pelo prompt do lote
+        messages = conversation[:-1] + [{"role": "user", "content": prompt['mensagem']}]
+        custom_id = f"{index}-{prompt['id']}"
+        requests.append({
+            'custom_id': custom_id,
+            'method': 'POST',
+            'url': BATCH_ENDPOINT,
+            'body': {'model': model, 'messages': messages},
+        })
+        targets.append({'custom_id': custom_id, 'raiz': root_dir, 'mensagem': prompt['mensagem']})
+    return requests, targets
+
+
+def submit_batch(client, requests):
+    """Envia o arquivo JSONL e cria o lote na Batch API. Retorna o id do lote."""
+    payload = "".join(json.dumps(request, ensure_ascii=False) + "\n" for request in requests)
+    input_file = client.files.create(file=('lote.jsonl', payload.encode('utf-8')), purpose='batch')
+    batch = client.batches.create(input_file_id=input_file.id, endpoint=BATCH_ENDPOINT, completion_window='24h')
+    emit_event('lote_criado', lote=batch.id, requisicoes=len(requests))
+    return batch.id
+
+
+def wait_for_batch(client, batch_id, intervalo=30.0, sleep=time.sleep):
+    """Consulta o lote até um status final e retorna as respostas por custom_id (texto ou erro)"""
+    batch = client.batches.retrieve(batch_id)
+    while batch.status not in STATUS_FINAIS:
+        log(f"Lote {batch_id}: {batch.status}")
+        emit_event('lote_status', lote=batch_id, status=batch.status)
+        sleep(intervalo)
+        batch = client.batches.retrieve(batch_id)
+
+    if batch.status != 'completed' and not batch.output_file_id:
+        raise RuntimeError(f"O lote {batch_id} terminou com status '{batch.status}'.")
+
+    results = {}
+    for file_id in (batch.output_file_id, getattr(batch, 'error_file_id', None)):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get('response') or {}
+            if entry.get('error') or response.get('status_code') != 200:
+                error = entry.get('error') or response.get('body', {}).get('error')
+                results[entry['custom_id']] = {'erro': error}
+            else:
+                results[entry['custom_id']] = {'resposta': response['body']['choices'][0]['message']['content']}
+    return results
+
+
+def distribute_results(targets, results):
+    """Grava cada prompt e sua resposta na conversa do projeto correspondente, na ordem do lote.
+
+    Um rascunho ainda não enviado na mensagem atual é preservado: ele passa para a mensagem seguinte.
+    Retorna a quantidade de respostas salvas.
+    """
+    saved = 0
+    for target in targets:
+        result = results.get(target['custom_id'])
+        if result is None or 'resposta' not in result:
+            erro = result['erro'] if result else 'sem resposta no lote'
+            log(f"[LOG] Requisição {target['custom_id']} não foi salva: {erro}")
+            emit_event('lote_erro', custom_id=target['custom_id'], erro=erro)
+            continue
+
+        _, conversa_path = initialize_conversation(target['raiz'])
+        message_file = os.path.join(conversa_path, f"{get_current_turn(conversa_path)}_mensagem.md")
+        draft = read_draft_message(message_file)
+        with open(message_file, 'w', encoding='utf-8') as f:
+            f.write(target['mensagem'])
+        save_response(conversa_path, result['resposta'], message_file)
+        if draft is not None:
+            next_message_file = os.path.join(conversa_path, f"{get_current_turn(conversa_path)}_mensagem.md")
+            with open(next_message_file, 'w', encoding='utf-8') as f:
+                f.write(draft)
+            log(f"[LOG] Rascunho de {os.path.basename(message_file)} movido para {next_message_file}")
+        saved += 1
+    return saved
+
+
+def get_batch_state_path(root_dir, batch_id):
+    """Retorna o caminho do arquivo com os destinos de um lote enviado"""
+    return os.path.join(root_dir, '.codeai', LOTES_DIR, f"{batch_id}.json")
+
+
+def save_batch_state(root_dir, batch_id, targets):
+    """Guarda os destinos do lote para que ele possa ser retomado com 'codeai lote --retomar'"""
+    state_path = get_batch_state_path(root_dir, batch_id)
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(targets, f, ensure_ascii=False)
+    return state_path
+
+
+def load_batch_state(root_dir, batch_id):
+    """Carrega os destinos de um lote enviado anteriormente"""
+    state_path = get_batch_state_path(root_dir, batch_id)
+    if not os.path.exists(state_path):
+        raise FileNotFoundError(f"Lote {batch_id} não encontrado em {state_path}.")
+    with open(state_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -1,17 +1,62 @@
 import os
-import json
 import click
 import yaml
-from codeai.context_manager import initialize_context, create_context_file
-from codeai.conversation_manager import initialize_conversation, save_response, load_conversation
+from codeai.context_manager import initialize_context, create_context_file, create_context_files
+from codeai.conversation_manager import MENSAGEM_INICIAL, initialize_conversation, has_turn_file
+from codeai.config import load_project_config
+from codeai.messaging import processar_envio, archive_from_config
+from codeai.batch import (
+    load_prompts,
+    build_batch_requests,
+    submit_batch,
+    wait_for_batch,
+    distribute_results,
+    save_batch_state,
+    load_batch_state,
+    get_batch_state_path,
+)
+from codeai.daemon import get_socket_path, run_daemon, send_command
+from codeai.profiler import start_profiling, finish_profiling
+from codeai.output import SILENCIOSO, RESUMO, VERBOSO, DEBUG, configure_output, log, emit_event
 
 CONFIG_DIR = '.codeai'
 CONVERSA_DIR = 'conversa'
 
 @click.group()
-def main():
+@click.option('--perfil', is_flag=True, help='Executa o comando sob cProfile e tracemalloc e grava o resultado em .codeai/perfil/.')
+@click.option('--silencioso', is_flag=True, help='Não mostra o resumo do envio e da resposta.')
+@click.option('--verboso', is_flag=True, help='Mostra a prévia de cada mensagem e a resposta completa.')
+@click.option('--debug', is_flag=True, help='Mostra o prompt completo enviado ao modelo.')
+@click.option('--eventos-json', is_flag=True, help='Emite eventos JSON (um por linha) no stdout; o texto vai para o stderr.')
+@click.pass_context
+def main(ctx, perfil, silencioso, verboso, debug, eventos_json):
     """Comando principal do codeai"""
-    pass
+    nivel = SILENCIOSO if silencioso else DEBUG if debug else VERBOSO if verboso else RESUMO
+    configure_output(nivel, eventos_json)
+    ctx.ensure_object(dict)['perfil'] = perfil
+    if perfil:
+        profiler = start_profiling()
+        ctx.call_on_close(lambda: _report_profile(profiler, ctx.invoked_subcommand))
+
+def _report_profile(profiler, command_name):
+    """Grava os arquivos de perfil e mostra as funções mais custosas"""
+    pstats_path, alocacoes_path, summary = finish_profiling(profiler, os.getcwd(), command_name)
+    emit_event('perfil', pstats=pstats_path, alocacoes=alocacoes_path)
+    # O relatório foi pedido explicitamente: aparece em qualquer nível (no stderr com --eventos-json)
+    log(f"Perfil salvo em {pstats_path}", SILENCIOSO)
+    log(f"Relatório de alocações salvo em {alocacoes_path}", SILENCIOSO)
+    log("Funções mais custosas (tempo acumulado / próprio / chamadas):", SILENCIOSO)
+    for cumulative, own, calls, name in summary:
+        log(f"  {cumulative:8.4f}s {own:8.4f}s {calls:8d}  {name}", SILENCIOSO)
+
+def _send_to_daemon(root_dir, comando):
+    """Envia o comando ao daemon do projeto, se houver um ativo.
+
+    Com --perfil, o comando sempre roda no próprio processo: pelo daemon, apenas a ida e volta no socket seria medida.
+    """
+    if click.get_current_context().find_root().obj.get('perfil'):
+        return None
+    return send_command(root_dir, comando)
 
 @main.command()
 def criar():
@@ -22,95 +67,145 @@ def criar():
     # Verifica se o diretório .codeai já existe
     if not os.path.exists(config_dir):
         os.makedirs(config_dir)
-        click.echo(f"Diretório {config_dir} criado com sucesso.")
+        log(f"Diretório {config_dir} criado com sucesso.")
 
     # Inicializa o arquivo de configuração e a pasta de conversa
     success, message = initialize_context(root_dir)
-    click.echo(message)
+    log(message)
 
     # Adiciona o controle de histórico ao arquivo config.yml
     config_data = {
         'modelo': 'gpt-4o-mini',
         'temperatura': 0.3,
-        'controle_de_historico': 0
+        'controle_de_historico': 0,
+        'modo_contexto': 'completo'
     }
 
     yaml_config_path = os.path.join(config_dir, 'config.yml')
     with open(yaml_config_path, 'w', encoding='utf-8') as yaml_file:
         yaml.dump(config_data, yaml_file)
 
-    click.echo(f"Arquivo de configuração criado em {yaml_config_path}")
+    log(f"Arquivo de configuração criado em {yaml_config_path}")
 
     # Inicializa a conversa
     system_message_path, conversa_path = initialize_conversation(root_dir)
 
     # Cria o arquivo de mensagem inicial
     first_message_path = os.path.join(conversa_path, '1_mensagem.md')
-    if not os.path.exists(first_message_path):
+    if not has_turn_file(conversa_path, '1_mensagem.md'):
         with open(first_message_path, 'w', encoding='utf-8') as f:
-            f.write("# Escreva sua mensagem aqui e salve o arquivo.\n")
-        click.echo(f"Arquivo de mensagem inicial criado em {first_message_path}.")
+            f.write(MENSAGEM_INICIAL)
+        log(f"Arquivo de mensagem inicial criado em {first_message_path}.")
     else:
-        click.echo(f"Arquivo de mensagem inicial já existe em {first_message_path}.")
+        log(f"Arquivo de mensagem inicial já existe em {first_message_path}.")
 
-    click.echo(f"Pasta de conversa e arquivo de system criados em {os.path.join(CONFIG_DIR, CONVERSA_DIR)}.")
+    emit_event('projeto_criado', raiz=root_dir, config=yaml_config_path, mensagem=first_message_path)
+    log(f"Pasta de conversa e arquivo de system criados em {os.path.join(CONFIG_DIR, CONVERSA_DIR)}.")
 
 @main.command()
-def contexto():
+@click.option('--raizes', is_flag=True, help='Gera o contexto de cada projeto informado, em processos paralelos.')
+@click.option('--processos', type=int, help='Número de processos usados com --raizes (padrão: número de CPUs).')
+@click.argument('pastas', nargs=-1, type=click.Path(exists=True, file_okay=False))
+def contexto(raizes, processos, pastas):
     """Gera o arquivo de contexto sem enviar a mensagem"""
     root_dir = os.getcwd()
+    if raizes:
+        if not pastas:
+            raise click.UsageError("Informe as pastas dos projetos após --raizes.")
+        for pasta, context_file_path, erro in create_context_files([os.path.abspath(p) for p in pastas], processos):
+            if erro:
+                emit_event('contexto_erro', raiz=pasta, erro=erro)
+                log(f"Erro ao gerar o contexto de {pasta}: {erro}", SILENCIOSO)
+            else:
+                emit_event('contexto_gerado', raiz=pasta, arquivo=context_file_path)
+                log(f"Arquivo de contexto de {pasta} gerado em {context_file_path}")
+        return
+    if pastas:
+        raise click.UsageError("Use --raizes para gerar o contexto de outras pastas.")
+
     try:
-        context_file_path = create_context_file(root_dir)
-        click.echo(f"Arquivo de contexto gerado em {context_file_path}")
+        context_file_path = _send_to_daemon(root_dir, 'contexto')
+        if context_file_path is None:
+            context_file_path = create_context_file(root_dir, load_project_config(root_dir).context)
+        emit_event('contexto_gerado', raiz=root_dir, arquivo=context_file_path)
+        log(f"Arquivo de contexto gerado em {context_file_path}")
     except FileNotFoundError as e:
-        click.echo(str(e))
+        emit_event('contexto_erro', raiz=root_dir, erro=str(e))
+        log(str(e), SILENCIOSO)
 
 @main.command()
 def enviar():
     """Envia a mensagem para a API do modelo escolhido (OpenAI ou Gemini)"""
     root_dir = os.getcwd()
 
-    # Inicializa ou carrega a conversa
-    system_message_path, conversa_path = initialize_conversation(root_dir)
-
-    # Carrega a mensagem de system
-    with open(system_message_path, 'r', encoding='utf-8') as sys_file:
-        system_message = json.load(sys_file)
+    # Se houver um daemon ativo para o projeto, ele executa o envio com o estado já carregado
+    # e devolve a mesma saída (texto e eventos) de uma execução local
+    if _send_to_daemon(root_dir, 'enviar') is not None:
+        return
 
-    # Gera o contexto e a estrutura
-    context_file_path = create_context_file(root_dir)
-    with open(context_file_path, 'r', encoding='utf-8') as context_file:
-        context_message = context_file.read()
+    processar_envio(root_dir)
 
-    # Carrega a configuração
-    config_file_path = os.path.join(root_dir, CONFIG_DIR, 'config.yml')
-    with open(config_file_path, 'r', encoding='utf-8') as f:
-        config_data = yaml.safe_load(f)
+@main.command()
+def compactar():
+    """Compacta as interações antigas da conversa em segmentos gzip/zstd com índice"""
+    root_dir = os.getcwd()
+    _, conversa_path = initialize_conversation(root_dir)
+    config = load_project_config(root_dir)
 
-    # Obter o valor de controle_de_historico
-    controle_de_historico = config_data.get('controle_de_historico', 0)
+    archived = archive_from_config(conversa_path, config.settings)
+    emit_event('compactacao', interacoes=archived)
+    if archived:
+        log(f"{len(archived)} interações compactadas em {os.path.join(conversa_path, 'arquivo')}.")
+    else:
+        log("Nenhuma interação para compactar.")
 
-    # Carregar a conversa com base no controle_de_historico
-    conversation = load_conversation(conversa_path, controle_de_historico)
+@main.command()
+@click.option('--parar', is_flag=True, help='Encerra o daemon em execução para o projeto atual.')
+def servidor(parar):
+    """Mantém um daemon com configuração, índice de arquivos e conexão com o provedor carregados"""
+    root_dir = os.getcwd()
+    if parar:
+        if send_command(root_dir, 'parar') is None:
+            emit_event('servidor', estado='inativo')
+            log("Nenhum daemon em execução para este projeto.")
+        else:
+            emit_event('servidor', estado='encerrado')
+            log("Daemon encerrado.")
+        return
+
+    emit_event('servidor', estado='escutando', socket=get_socket_path(root_dir))
+    log(f"Daemon escutando em {get_socket_path(root_dir)}")
+    run_daemon(root_dir)
 
-    # Adiciona system message e contexto ao array de conversa
-    conversation.insert(0, {"role": "system", "content": system_message['content']})
-    if context_message:
-        conversation.insert(1, {"role": "system", "content": f"Contexto adicional: {context_message}"})
+@main.command()
+@click.argument('origem', required=False, type=click.Path(exists=True))
+@click.option('--retomar', metavar='ID_DO_LOTE', help='Retoma um lote já enviado e distribui as respostas.')
+@click.option('--intervalo', default=30.0, show_default=True, help='Segundos entre as consultas de status do lote.')
+def lote(origem, retomar, intervalo):
+    """Envia vários prompts (diretório ou JSONL) pela Batch API da OpenAI e salva as respostas nas conversas"""
+    root_dir = os.getcwd()
+    if not origem and not retomar:
+        raise click.UsageError("Informe o diretório ou arquivo JSONL com os prompts, ou --retomar.")
 
-    # Passar o modelo carregado para a função de envio
-    model = config_data.get('modelo', 'gpt-4o-mini')  # Valor padrão caso não esteja definido
-    if config_data.get('modelo') == 'gemini-1.5-flash':
-        from codeai.gemini_connector import send_message_to_gemini
-        response = send_message_to_gemini(conversation)
+    from codeai.openai_connector import client
+    if retomar:
+        batch_id = retomar
+        targets = load_batch_state(root_dir, batch_id)
     else:
-        from codeai.openai_connector import send_message_to_openai
-        response = send_message_to_openai(conversation, model)
-
-    # Salva a resposta
-    message_files = sorted([f for f in os.listdir(conversa_path) if f.endswith('_mensagem.md')])
-    last_user_message_file = os.path.join(conversa_path, message_files[-1])
-    save_response(conversa_path, response, last_user_message_file)
+        prompts = load_prompts(origem)
+        if not prompts:
+            log(f"Nenhum prompt encontrado em {origem}.", SILENCIOSO)
+            return
+        requests, targets = build_batch_requests(prompts, root_dir)
+        batch_id = submit_batch(client, requests)
+        save_batch_state(root_dir, batch_id, targets)
+        log(f"Lote {batch_id} enviado com {len(requests)} requisições. Use 'codeai lote --retomar {batch_id}' se a espera for interrompida.")
+
+    results = wait_for_batch(client, batch_id, intervalo)
+    saved = distribute_results(targets, results)
+    os.remove(get_batch_state_path(root_dir, batch_id))
+    emit_event('lote_concluido', lote=batch_id, salvas=saved, total=len(targets))
+    log(f"{saved} de {len(targets)} respostas salvas nas conversas.")
 
 if __name__ == '__main__':
     main()
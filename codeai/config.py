@@ -0,0 +1,116 @@
+import os
+import json
+import yaml
+from codeai.context_manager import get_config_path, get_ignore_rules, load_context
+
+CONFIG_FILE = 'config.yml'
+CACHE_FILE = 'config_cache.json'
+CACHE_VERSION = 4
+
+class ProjectConfig:
+    """Configuração do projeto interpretada uma única vez: contexto, regras compiladas e opções do config.yml"""
+
+    def __init__(self, root_dir, context_data, settings, sources):
+        self.root_dir = root_dir
+        self.context = context_data  # Dicionário de load_context, com a pasta raiz absoluta e as regras compiladas
+        self.settings = settings  # Conteúdo do config.yml (modelo, temperatura, histórico...)
+        self.sources = sources  # Arquivos de origem -> mtime_ns usado na validação do cache
+
+    @property
+    def pasta_raiz(self):
+        return self.context['pasta_raiz']
+
+    @property
+    def modelo(self):
+        return self.settings.get('modelo', 'gpt-4o-mini')
+
+    @property
+    def controle_de_historico(self):
+        return self.settings.get('controle_de_historico', 0)
+
+    def is_current(self):
+        """Verifica se os arquivos de origem não mudaram desde que a configuração foi lida"""
+        return _source_mtimes(self.root_dir) == self.sources
+
+
+def _source_mtimes(root_dir):
+    """Retorna o mtime_ns de cada arquivo de configuração (None se ele não existir)"""
+    mtimes = {}
+    for path in (get_config_path(root_dir), os.path.join(root_dir, '.codeai', CONFIG_FILE)):
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtimes[path] = None
+    return mtimes
+
+
+def get_cache_path(root_dir):
+    """Retorna o caminho do cache da configuração dentro do diretório .codeai"""
+    return os.path.join(root_dir, '.codeai', CACHE_FILE)
+
+
+def _compile_rules(context_data):
+    """Pré-compila as regras de 'ignorar', 'estrutura_ignorar' e 'esboco' de cada pasta raiz"""
+    for pasta_raiz in context_data['pastas_raiz']:
+        for key in ('ignorar', 'estrutura_ignorar', 'esboco'):
+            get_ignore_rules(context_data, key, pasta_raiz)
+
+
+def build_project_config(root_dir):
+    """Lê .codeai_context e config.yml e monta a configuração com caminhos absolutos e regras compiladas"""
+    sources = _source_mtimes(root_dir)
+    context_data = load_context(root_dir)
+    context_data['pastas_raiz'] = [os.path.normpath(os.path.join(root_dir, pasta or '.'))
+                                   for pasta in context_data['pastas_raiz'] or ['']]
+    context_data['pasta_raiz'] = context_data['pastas_raiz'][0]
+    _compile_rules(context_data)
+
+    settings = {}
+    config_yml = os.path.join(root_dir, '.codeai', CONFIG_FILE)
+    if sources[config_yml] is not None:
+        with open(config_yml, 'r', encoding='utf-8') as f:
+            settings = yaml.safe_load(f) or {}
+
+    return ProjectConfig(root_dir, context_data, settings, sources)
+
+
+def _load_cached_config(root_dir):
+    """Lê a configuração do cache em .codeai/, ou None se ele não existir, for de outra versão ou estiver desatualizado.
+
+    O cache guarda apenas dados (JSON); as regras compiladas são refeitas a cada carga.
+    """
+    try:
+        with open(get_cache_path(root_dir), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('versao') != CACHE_VERSION or cached.get('raiz') != root_dir:
+            return None
+        config = ProjectConfig(root_dir, cached['contexto'], cached['opcoes'], cached['origens'])
+    except (OSError, ValueError, KeyError, AttributeError, TypeError):
+        return None  # Cache ausente ou corrompido
+    if not config.is_current():
+        return None
+    _compile_rules(config.context)
+    return config
+
+
+def load_project_config(root_dir):
+    """Retorna a configuração do projeto, usando o cache em .codeai/ enquanto os arquivos de origem não mudarem"""
+    config = _load_cached_config(root_dir)
+    if config is not None:
+        return config
+
+    config = build_project_config(root_dir)
+    cached = {
+        'versao': CACHE_VERSION,
+        'raiz': root_dir,
+        'origens': config.sources,
+        'contexto': {key: value for key, value in config.context.items() if key != 'regras'},
+        'opcoes': config.settings,
+    }
+    try:
+        payload = json.dumps(cached)
+        with open(get_cache_path(root_dir), 'w', encoding='utf-8') as f:
+            f.write(payload)
+    except (OSError, TypeError, ValueError):
+        pass  # O cache é apenas uma otimização (ex.: config.yml com valores que não são JSON)
+    return config
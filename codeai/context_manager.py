@@ -1,5 +1,18 @@
 import os
+import re
 import fnmatch
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from codeai.directory_walker import DirectoryManifest, walk_directory
+from codeai.outline import extract_outline, load_outline_cache, save_outline_cache
+from codeai.file_slices import (
+    LIMITE_TAMANHO_PADRAO,
+    parse_slice,
+    parse_size,
+    describe_slice,
+    read_slice,
+    read_excerpt,
+)
 
 CONFIG_FILE = '.codeai_context'
 
@@ -71,10 +84,17 @@ def initialize_context(root_dir):
     with open(config_path, 'w', encoding='utf-8') as config_file:
         # Seção do contexto
         config_file.write("[context]\n")
-        config_file.write(f"pasta-raiz: {root_dir}\n\n")
+        config_file.write(f"pasta-raiz: {root_dir}\n")
+        config_file.write("# Repita 'pasta-raiz:' para incluir outros projetos no mesmo contexto\n\n")
         config_file.write("adicionar:\n")
         config_file.write(".\n")
-        config_file.write("# Adicione os caminhos para incluir no contexto, um por linha\n\n")
+        config_file.write("# Adicione os caminhos para incluir no contexto, um por linha\n")
+        config_file.write("# Recortes: 'arquivo:+N' (primeiras N linhas), 'arquivo:-N' (últimas N) ou 'arquivo:A-B'\n\n")
+        config_file.write("# Arquivos maiores que o limite são enviados apenas com o início e o fim\n")
+        config_file.write(f"# limite-tamanho: {LIMITE_TAMANHO_PADRAO // 1024}k\n\n")
+        config_file.write("# Use 'modo: esboco' para enviar apenas assinaturas e docstrings de todos os arquivos,\n")
+        config_file.write("# ou liste em 'esboco:' os caminhos/padrões que devem ser enviados como esboço\n")
+        config_file.write("esboco:\n\n")
         config_file.write("ignorar:\n")
         for pattern in common_ignore_patterns:
             config_file.write(f"{pattern}\n")
@@ -82,6 +102,10 @@ def initialize_context(root_dir):
 
         # Seção da estrutura
         config_file.write("[estrutura]\n")
+        config_file.write("# Opcional: limite a árvore em projetos grandes\n")
+        config_file.write("# profundidade-maxima: 4\n")
+        config_file.write("# max-entradas: 200\n")
+        config_file.write("# formato: compacto\n\n")
         config_file.write("adicionar:\n")
         config_file.write(".\n")
         config_file.write("# Adicione os caminhos para estruturar, um por linha\n\n")
@@ -105,10 +129,18 @@ def load_context(root_dir):
     
     context_data = {
         'pasta_raiz': '',
+        'pastas_raiz': [],
         'adicionar': [],
+        'recortes': {},
+        'limite_tamanho': LIMITE_TAMANHO_PADRAO,
         'ignorar': [],
+        'modo': 'completo',
+        'esboco': [],
         'estrutura_adicionar': [],
         'estrutura_ignorar': [],
+        'estrutura_profundidade': None,
+        'estrutura_max_entradas': None,
+        'estrutura_formato': 'arvore',
         'outros': []
     }
     
@@ -123,7 +155,17 @@ def load_context(root_dir):
             if line.startswith("#") or not line:
                 continue  # Ignora comentários e linhas vazias
             if line.startswith("pasta-raiz:"):
-                context_data['pasta_raiz'] = line.split(":", 1)[1].strip()
+                context_data['pastas_raiz'].append(line.split(":", 1)[1].strip())
+            elif section == "context" and line.startswith("modo:"):
+                context_data['modo'] = line.split(":", 1)[1].strip()
+            elif section == "context" and line.startswith("limite-tamanho:"):
+                context_data['limite_tamanho'] = parse_size(line.split(":", 1)[1])
+            elif section == "estrutura" and line.startswith("profundidade-maxima:"):
+                context_data['estrutura_profundidade'] = int(line.split(":", 1)[1].strip())
+            elif section == "estrutura" and line.startswith("max-entradas:"):
+                context_data['estrutura_max_entradas'] = int(line.split(":", 1)[1].strip())
+            elif section == "estrutura" and line.startswith("formato:"):
+                context_data['estrutura_formato'] = line.split(":", 1)[1].strip()
             elif line == "[context]":
                 section = "context"
                 sub_section = None  # Reinicia a sub-seção ao trocar de seção
@@ -137,22 +179,103 @@ def load_context(root_dir):
                 sub_section = "adicionar"
             elif line == "ignorar:":
                 sub_section = "ignorar"
+            elif line == "esboco:":
+                sub_section = "esboco"
             elif sub_section == "adicionar" and section == "context":
-                context_data['adicionar'].append(line)
+                file_path, spec = parse_slice(line)
+                context_data['adicionar'].append(file_path)
+                if spec is not None:
+                    context_data['recortes'][file_path] = spec
             elif sub_section == "ignorar" and section == "context":
                 context_data['ignorar'].append(line)
+            elif sub_section == "esboco" and section == "context":
+                context_data['esboco'].append(line)
             elif sub_section == "adicionar" and section == "estrutura":
                 context_data['estrutura_adicionar'].append(line)
             elif sub_section == "ignorar" and section == "estrutura":
                 context_data['estrutura_ignorar'].append(line)
             elif section == "outros":
                 context_data['outros'].append(line)
-    
+
+    # A primeira pasta raiz continua sendo a pasta raiz principal do contexto
+    if context_data['pastas_raiz']:
+        context_data['pasta_raiz'] = context_data['pastas_raiz'][0]
     return context_data
 
 
+def get_root_dirs(context_data):
+    """Retorna as pastas raiz do contexto, na ordem em que aparecem no arquivo de configuração"""
+    return context_data.get('pastas_raiz') or [context_data['pasta_raiz']]
+
+
+def for_root(context_data, pasta_raiz):
+    """Retorna uma cópia do contexto voltada para uma das pastas raiz, compartilhando as regras compiladas"""
+    context_data.setdefault('regras', {})
+    return dict(context_data, pasta_raiz=pasta_raiz)
+
+
+class IgnoreRules:
+    """Padrões de 'ignorar' pré-processados para um diretório raiz.
+
+    Equivale a chamar should_ignore com a lista de padrões, mas resolve os caminhos dos diretórios
+    e compila os padrões de nome uma única vez.
+    """
+
+    def __init__(self, ignore_patterns, root_dir):
+        self.patterns = [pattern.strip() for pattern in ignore_patterns if pattern.strip()]
+        self.root_dir = root_dir
+        directories, prefixes, names = set(), [], []
+        for pattern in self.patterns:
+            if pattern.endswith("/"):
+                directory_pattern = os.path.abspath(os.path.join(root_dir, pattern.rstrip("/")))
+                directories.add(directory_pattern)
+                prefixes.append(directory_pattern + os.sep)
+            elif pattern.endswith("/*"):
+                prefixes.append(os.path.abspath(os.path.join(root_dir, pattern[:-2])) + os.sep)
+            else:
+                names.append(fnmatch.translate(os.path.normcase(pattern)))
+        self.directories = directories
+        self.prefixes = tuple(prefixes)
+        self.names = re.compile("|".join(names)) if names else None
+
+    def matches(self, file_path):
+        """Verifica se o caminho corresponde a algum dos padrões"""
+        # Caminhos vindos da caminhada já são absolutos e normalizados
+        if not os.path.isabs(file_path) or file_path.endswith(os.sep):
+            file_path = os.path.abspath(file_path)
+        if file_path in self.directories or file_path.startswith(self.prefixes):
+            return True
+        return self.names is not None and self.names.match(os.path.normcase(os.path.basename(file_path))) is not None
+
+
+def get_slices(context_data, root_dir=None):
+    """Retorna os recortes de 'adicionar' indexados pelo caminho absoluto do arquivo na pasta raiz"""
+    root_dir = root_dir or context_data['pasta_raiz']
+    rules = context_data.setdefault('regras', {})
+    cache_key = f"recortes:{root_dir}"
+    if cache_key not in rules:
+        rules[cache_key] = {
+            os.path.normpath(os.path.join(root_dir, file_path)): spec
+            for file_path, spec in context_data.get('recortes', {}).items()
+        }
+    return rules[cache_key]
+
+
+def get_ignore_rules(context_data, key, root_dir=None):
+    """Retorna as regras compiladas da lista de padrões 'key' do contexto, compilando-as na primeira vez"""
+    root_dir = root_dir or context_data['pasta_raiz']
+    rules = context_data.setdefault('regras', {})
+    cache_key = f"{key}:{root_dir}"
+    if cache_key not in rules:
+        rules[cache_key] = IgnoreRules(context_data.get(key, []), root_dir)
+    return rules[cache_key]
+
+
 def should_ignore(file_path, ignore_patterns, root_dir):
     """Verifica se o arquivo ou diretório deve ser ignorado com base nos padrões."""
+    if isinstance(ignore_patterns, IgnoreRules):
+        return ignore_patterns.matches(file_path)
+
     abs_file_path = os.path.abspath(file_path)
     base_name = os.path.basename(file_path)
 
@@ -184,85 +307,345 @@ def should_ignore(file_path, ignore_patterns, root_dir):
     return False
 
 
-def generate_structure(root_dir):
-    """Gera a estrutura de diretórios em formato de árvore usando configurações específicas da seção [estrutura]"""
-    context_data = load_context(root_dir)
-    estrutura_adicionar = context_data['estrutura_adicionar']
-    estrutura_ignorar = context_data['estrutura_ignorar']
+def _summarize_directory(name, extensions):
+    """Resume um diretório recolhido com a contagem de arquivos e um histograma de extensões"""
+    total = sum(extensions.values())
+    if not total:
+        return f"{name} — 0 arquivos"
+    top = extensions.most_common(5)
+    parts = [f"{count} {ext}" for ext, count in top]
+    rest = total - sum(count for _, count in top)
+    if rest:
+        parts.append(f"{rest} outros")
+    return f"{name} — {total} arquivos: {', '.join(parts)}"
+
+
+def generate_structure(root_dir, context_data=None, dir_manifest=None):
+    """Gera a estrutura de diretórios em formato de árvore usando configurações específicas da seção [estrutura]
+
+    Diretórios além de 'profundidade-maxima' ou com mais de 'max-entradas' entradas são recolhidos em uma
+    linha com a contagem de arquivos por extensão. 'formato: compacto' usa uma linha por diretório, com o
+    caminho relativo como prefixo, em vez de indentação.
+    """
+    if context_data is None:
+        context_data = load_context(root_dir)
+    pasta_raiz = context_data['pasta_raiz']
+    estrutura_ignorar = get_ignore_rules(context_data, 'estrutura_ignorar')
+    max_depth = context_data.get('estrutura_profundidade')
+    max_entries = context_data.get('estrutura_max_entradas')
+
+    nodes = {}  # diretório expandido -> (arquivos, subdiretórios)
+    collapsed = {}  # diretório recolhido -> Counter de extensões da subárvore
+    owner = {}  # diretório dentro de uma subárvore recolhida -> diretório recolhido
+
+    for file_path in context_data['estrutura_adicionar']:
+        if file_path != '.':
+            continue
+        for dirpath, dirnames, filenames in walk_directory(pasta_raiz, dir_manifest):
+            # Ignorar pastas com base nos padrões de [estrutura]
+            if dirpath in nodes or dirpath in collapsed or should_ignore(dirpath, estrutura_ignorar, pasta_raiz):
+                dirnames[:] = []  # Do not descend into ignored directories
+                continue
+            dirnames[:] = [d for d in dirnames if not should_ignore(os.path.join(dirpath, d), estrutura_ignorar, pasta_raiz)]
+            filenames = [f for f in filenames if not should_ignore(os.path.join(dirpath, f), estrutura_ignorar, pasta_raiz)]
+
+            # Arquivos de subárvores recolhidas só entram na contagem
+            collapsed_dir = owner.get(dirpath)
+            if collapsed_dir is None and dirpath != pasta_raiz:
+                depth = dirpath.replace(pasta_raiz, '').count(os.sep)
+                too_deep = max_depth is not None and depth > max_depth
+                too_large = max_entries is not None and len(dirnames) + len(filenames) > max_entries
+                if too_deep or too_large:
+                    collapsed_dir = dirpath
+                    collapsed[dirpath] = Counter()
+
+            if collapsed_dir is not None:
+                collapsed[collapsed_dir].update(os.path.splitext(f)[1] or '(sem extensão)' for f in filenames)
+                for dirname in dirnames:
+                    owner[os.path.join(dirpath, dirname)] = collapsed_dir
+                continue
+
+            nodes[dirpath] = (filenames, [os.path.join(dirpath, d) for d in dirnames])
+
+    if pasta_raiz not in nodes:
+        return []
+    if context_data.get('estrutura_formato') == 'compacto':
+        return _render_compact(pasta_raiz, nodes, collapsed)
+    return _render_tree(pasta_raiz, nodes, collapsed)
+
+
+def _render_tree(pasta_raiz, nodes, collapsed):
+    """Renderiza a estrutura com indentação de 4 espaços por nível"""
     structure = []
-    processed_dirs = set()
+    stack = [(pasta_raiz, 0)]
+    while stack:
+        dirpath, depth = stack.pop()
+        indent = ' ' * 4 * depth
+        if dirpath in collapsed:
+            structure.append(f"{indent}{_summarize_directory(os.path.basename(dirpath) + '/', collapsed[dirpath])}")
+            continue
+        filenames, subdirs = nodes[dirpath]
+        structure.append(f"{indent}{os.path.basename(dirpath)}/")
+        file_indent = ' ' * 4 * (depth + 1)
+        for filename in filenames:
+            structure.append(f"{file_indent}{filename}")
+        stack.extend((subdir, depth + 1) for subdir in reversed(subdirs) if subdir in nodes or subdir in collapsed)
+    return structure
+
+
+def _render_compact(pasta_raiz, nodes, collapsed):
+    """Renderiza uma linha por diretório, usando o caminho relativo como prefixo dos arquivos"""
+    structure = []
+    stack = [pasta_raiz]
+    while stack:
+        dirpath = stack.pop()
+        rel_path = os.path.relpath(dirpath, pasta_raiz).replace(os.sep, '/')
+        prefix = './' if rel_path == '.' else f"{rel_path}/"
+        if dirpath in collapsed:
+            structure.append(_summarize_directory(prefix, collapsed[dirpath]))
+            continue
+        filenames, subdirs = nodes[dirpath]
+        subdirs = [subdir for subdir in subdirs if subdir in nodes or subdir in collapsed]
+        # Diretórios sem arquivos aparecem apenas como prefixo dos seus subdiretórios
+        if filenames:
+            structure.append(f"{prefix}: {', '.join(filenames)}")
+        elif not subdirs:
+            structure.append(prefix)
+        stack.extend(reversed(subdirs))
+    return structure
+
 
-    for file_path in estrutura_adicionar:
+def iter_context_files(context_data, dir_manifest=None):
+    """Percorre os arquivos selecionados pela seção [context], sem duplicatas.
+
+    Retorna tuplas (caminho absoluto, caminho exibido no contexto). O manifesto de diretórios,
+    se informado, evita listar novamente diretórios que não mudaram.
+    """
+    processed_files = set()  # Evitar duplicatas
+    ignorar = get_ignore_rules(context_data, 'ignorar')
+    recortes = context_data.get('recortes', {})
+    # Com várias pastas raiz, os caminhos relativos são exibidos completos para não se confundirem
+    multiple_roots = len(get_root_dirs(context_data)) > 1
+
+    for file_path in context_data['adicionar']:
         absolute_path = os.path.join(context_data['pasta_raiz'], file_path)
+
         if file_path == '.':
-            for dirpath, dirnames, filenames in os.walk(context_data['pasta_raiz']):
-                # Ignorar pastas com base nos padrões de [estrutura]
-                if should_ignore(dirpath, estrutura_ignorar, context_data['pasta_raiz']):
-                    dirnames[:] = []  # Do not descend into ignored directories
-                    continue
-                if dirpath in processed_dirs:
+            for dirpath, dirnames, filenames in walk_directory(context_data['pasta_raiz'], dir_manifest):
+                if ignorar.matches(dirpath):
+                    dirnames[:] = []  # Não desce em diretórios ignorados
                     continue
-                processed_dirs.add(dirpath)  # Evita duplicatas
-                # Adiciona o diretório com indentação para simular árvore
-                depth = dirpath.replace(context_data['pasta_raiz'], '').count(os.sep)
-                indent = ' ' * 4 * depth
-                structure.append(f"{indent}{os.path.basename(dirpath)}/")
-                
-                # Adiciona os arquivos com indentação
+                filenames = [f for f in filenames if not ignorar.matches(os.path.join(dirpath, f))]
                 for filename in filenames:
-                    if should_ignore(os.path.join(dirpath, filename), estrutura_ignorar, context_data['pasta_raiz']):
+                    abs_file_path = os.path.join(dirpath, filename)
+                    if abs_file_path in processed_files:
                         continue
-                    file_indent = ' ' * 4 * (depth + 1)
-                    structure.append(f"{file_indent}{filename}")
+                    processed_files.add(abs_file_path)
+                    yield abs_file_path, abs_file_path
+        # Um recorte pedido explicitamente vale mesmo para arquivos ignorados (ex.: logs)
+        elif os.path.isfile(absolute_path) and (file_path in recortes or not ignorar.matches(absolute_path)):
+            if absolute_path in processed_files:
+                continue
+            processed_files.add(absolute_path)
+            yield absolute_path, absolute_path if multiple_roots else file_path
 
-    return structure
 
+def read_file_content(file_path, file_cache=None):
+    """Lê o conteúdo UTF-8 de um arquivo, reaproveitando o cache em memória quando o arquivo não mudou.
 
-def create_context_file(root_dir):
-    """Cria um arquivo temporário contendo o conteúdo dos arquivos de contexto e da estrutura"""
-    context_data = load_context(root_dir)
-    context_file_path = os.path.join(root_dir, '.codeai', 'context_message.md')  # Alterado para .md
-    processed_files = set()  # Evitar duplicatas
+    O cache é um dicionário caminho -> (mtime_ns, tamanho, conteúdo) mantido por quem chama (ex.: o daemon).
+    """
+    if file_cache is None:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    stat = os.stat(file_path)
+    cached = file_cache.get(file_path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    file_cache[file_path] = (stat.st_mtime_ns, stat.st_size, content)
+    return content
 
+
+def read_context_file(file_path, context_data, file_cache=None):
+    """Lê o arquivo como ele entra no contexto e retorna (conteúdo, descrição do recorte ou None).
+
+    Arquivos com recorte em 'adicionar' têm apenas as linhas pedidas lidas, até 'limite-tamanho' bytes;
+    arquivos maiores que o limite são enviados com o início e o fim. Nesses casos o cache em memória não é usado.
+    """
+    limit = context_data.get('limite_tamanho')
+    spec = get_slices(context_data).get(os.path.normpath(file_path))
+    if spec is not None:
+        # O recorte também respeita o limite, para arquivos com linhas enormes (ex.: SQL ou JSON minificados)
+        return read_slice(file_path, spec, limit or None), describe_slice(spec)
+    if limit:
+        size = os.path.getsize(file_path)
+        if size > limit:
+            if file_cache is not None:
+                file_cache.pop(file_path, None)  # Não mantém em memória uma versão anterior e menor do arquivo
+            return read_excerpt(file_path, limit), f"início e fim de {size} bytes"
+    return read_file_content(file_path, file_cache), None
+
+
+def use_outline(file_path, context_data):
+    """Verifica se o arquivo deve ser enviado como esboço (modo global ou padrões da lista 'esboco')"""
+    if context_data.get('modo') == 'esboco':
+        return True
+    # Os padrões de 'esboco' seguem as mesmas regras de correspondência de 'ignorar'
+    return get_ignore_rules(context_data, 'esboco').matches(file_path)
+
+
+def uses_outline(context_data):
+    """Verifica se algum arquivo do contexto pode ser enviado como esboço"""
+    return context_data.get('modo') == 'esboco' or bool(context_data.get('esboco'))
+
+
+def iter_context_blocks(root_dir, context_data, file_cache=None, dir_manifest=None, outline_cache=None):
+    """Gera o bloco de texto de cada arquivo do contexto, como (caminho exibido, bloco)
+
+    Se outline_cache for informado, quem chama é responsável por gravá-lo; caso contrário, o cache de
+    esboços é carregado apenas se algum arquivo usar o modo esboço e gravado no final.
+    """
+    own_outline_cache = outline_cache is None
+
+    for abs_file_path, display_path in iter_context_files(context_data, dir_manifest):
+        try:
+            content, recorte = read_context_file(abs_file_path, context_data, file_cache)
+        except UnicodeDecodeError:
+            yield display_path, f"\n--- {display_path} não pôde ser lido como UTF-8 ---\n"
+            continue
+        if recorte is not None:
+            yield display_path, f"\n--- Trecho de {display_path} ({recorte}) ---\n{content}"
+            continue
+        if use_outline(abs_file_path, context_data):
+            if outline_cache is None:
+                outline_cache = load_outline_cache(root_dir)
+            outline = extract_outline(abs_file_path, content, outline_cache)
+            if outline is not None:
+                yield display_path, f"\n--- Esboço de {display_path} ---\n{outline}"
+                continue
+        yield display_path, f"\n--- Conteúdo de {display_path} ---\n{content}"
+
+    if own_outline_cache and outline_cache is not None:
+        save_outline_cache(root_dir, outline_cache)
+
+
+def _collect_root(job):
+    """Lê os blocos e gera a estrutura de uma pasta raiz; executado nos processos do pool"""
+    root_dir, context_data, file_cache, dir_manifest, outline_cache = job
+    blocks = list(iter_context_blocks(root_dir, context_data, file_cache, dir_manifest, outline_cache))
+    structure = generate_structure(root_dir, context_data, dir_manifest)
+    return blocks, structure, dir_manifest, outline_cache
+
+
+def _run_in_pool(function, items, processos=None):
+    """Aplica function a cada item em um pool de processos e retorna os resultados na ordem dos itens"""
+    processos = min(len(items), processos or os.cpu_count() or 1)
+    if processos <= 1:
+        return [function(item) for item in items]
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        return list(executor.map(function, items))
+
+
+def collect_context(root_dir, context_data, file_cache=None, dir_manifest=None, processos=None):
+    """Retorna (blocos, estrutura) de todas as pastas raiz do contexto, na ordem do arquivo de configuração.
+
+    Com mais de uma pasta raiz, cada uma é percorrida e lida em um processo separado. Com um cache de
+    arquivos em memória (ex.: no daemon), as pastas são processadas em sequência para reaproveitá-lo.
+    """
+    roots = get_root_dirs(context_data)
+    if len(roots) == 1:
+        blocks = list(iter_context_blocks(root_dir, context_data, file_cache, dir_manifest))
+        return blocks, generate_structure(root_dir, context_data, dir_manifest)
+
+    # O cache de esboços é compartilhado pelos processos e gravado uma única vez no final
+    outline_cache = load_outline_cache(root_dir) if uses_outline(context_data) else None
+    parallel = file_cache is None
+    jobs = []
+    for pasta_raiz in roots:
+        root_manifest = dir_manifest
+        if parallel and dir_manifest is not None:
+            root_manifest = dir_manifest.for_subtree(pasta_raiz)
+        jobs.append((root_dir, for_root(context_data, pasta_raiz), file_cache, root_manifest, outline_cache))
+    results = _run_in_pool(_collect_root, jobs, processos) if parallel else [_collect_root(job) for job in jobs]
+
+    blocks, structure, seen = [], [], set()
+    for pasta_raiz, (root_blocks, root_structure, root_manifest, root_outlines) in zip(roots, results):
+        for display_path, block in root_blocks:
+            if display_path not in seen:  # Pastas raiz sobrepostas não repetem arquivos
+                seen.add(display_path)
+                blocks.append((display_path, block))
+        structure.append(f"[{pasta_raiz}]")
+        structure.extend(root_structure)
+        if parallel and dir_manifest is not None:
+            dir_manifest.merge(root_manifest)
+        if outline_cache is not None and root_outlines is not outline_cache:
+            outline_cache.merge(root_outlines)
+
+    if outline_cache is not None:
+        save_outline_cache(root_dir, outline_cache)
+    return blocks, structure
+
+
+def write_context_file(context_file_path, context_data, blocks, structure):
+    """Grava o arquivo de contexto com os blocos dos arquivos e a estrutura do projeto"""
     with open(context_file_path, 'w', encoding='utf-8') as context_file:
-        context_file.write(f"Pasta raiz: {context_data['pasta_raiz']}\n")
+        roots = get_root_dirs(context_data)
+        if len(roots) > 1:
+            context_file.write(f"Pastas raiz: {', '.join(roots)}\n")
+        else:
+            context_file.write(f"Pasta raiz: {context_data['pasta_raiz']}\n")
         context_file.write("Conteúdo de arquivos adicionados:\n\n")
-        
-        # Iterar sobre os arquivos a serem adicionados ao contexto
-        for file_path in context_data['adicionar']:
-            absolute_path = os.path.join(context_data['pasta_raiz'], file_path)
-            
-            if file_path == '.':
-                for dirpath, _, filenames in os.walk(context_data['pasta_raiz']):
-                    if should_ignore(dirpath, context_data['ignorar'], context_data['pasta_raiz']):
-                        continue
-                    filenames = [f for f in filenames if not should_ignore(os.path.join(dirpath, f), context_data['ignorar'], context_data['pasta_raiz'])]
-                    for filename in filenames:
-                        abs_file_path = os.path.join(dirpath, filename)
-                        if abs_file_path in processed_files:
-                            continue
-                        processed_files.add(abs_file_path)  # Evita duplicatas
-                        try:
-                            with open(abs_file_path, 'r', encoding='utf-8') as f:
-                                context_file.write(f"\n--- Conteúdo de {abs_file_path} ---\n")
-                                context_file.write(f.read())
-                        except UnicodeDecodeError:
-                            context_file.write(f"\n--- {abs_file_path} não pôde ser lido como UTF-8 ---\n")
-            elif os.path.isfile(absolute_path) and not should_ignore(absolute_path, context_data['ignorar'], context_data['pasta_raiz']):
-                if absolute_path in processed_files:
-                    continue
-                processed_files.add(absolute_path)  # Evita duplicatas
-                try:
-                    with open(absolute_path, 'r', encoding='utf-8') as f:
-                        context_file.write(f"\n--- Conteúdo de {file_path} ---\n")
-                        context_file.write(f.read())
-                except UnicodeDecodeError:
-                    context_file.write(f"\n--- {file_path} não pôde ser lido como UTF-8 ---\n")
-
-        # Gera a estrutura de diretórios em formato de árvore
-        structure = generate_structure(root_dir)
+
+        for _, block in blocks:
+            context_file.write(block)
+
         context_file.write("\nEstrutura do projeto:\n\n")
         for line in structure:
             context_file.write(f"{line}\n")
-    
+
+    return context_file_path
+
+
+def create_context_file(root_dir, context_data=None, file_cache=None, dir_manifest=None):
+    """Cria um arquivo temporário contendo o conteúdo dos arquivos de contexto e da estrutura"""
+    if context_data is None:
+        context_data = load_context(root_dir)
+    context_file_path = os.path.join(root_dir, '.codeai', 'context_message.md')  # Alterado para .md
+
+    # Sem manifesto informado, usa o manifesto gravado em .codeai/ e o atualiza no final
+    own_manifest = dir_manifest is None
+    if own_manifest:
+        dir_manifest = DirectoryManifest(root_dir)
+
+    blocks, structure = collect_context(root_dir, context_data, file_cache, dir_manifest)
+    write_context_file(context_file_path, context_data, blocks, structure)
+
+    if own_manifest:
+        dir_manifest.save()
     return context_file_path
+
+
+def _create_project_context(root_dir):
+    """Gera o arquivo de contexto de um projeto independente; executado nos processos do pool.
+
+    Qualquer falha (configuração ausente ou inválida, arquivo ilegível) é devolvida como erro do projeto,
+    para que um projeto com problema não esconda os resultados dos demais.
+    """
+    from codeai.config import load_project_config
+
+    try:
+        return root_dir, create_context_file(root_dir, load_project_config(root_dir).context), None
+    except Exception as e:
+        return root_dir, None, str(e)
+
+
+def create_context_files(root_dirs, processos=None):
+    """Gera o arquivo de contexto de vários projetos em paralelo, um processo por projeto.
+
+    Retorna (pasta, caminho do arquivo de contexto, erro) de cada projeto, na ordem de root_dirs.
+    """
+    return _run_in_pool(_create_project_context, list(root_dirs), processos)
@@ -0,0 +1,130 @@
+import os
+import json
+import shutil
+import difflib
+import hashlib
+from codeai.conversation_manager import has_turn_file
+from codeai.directory_walker import DirectoryManifest
+from codeai.context_manager import (
+    load_context,
+    collect_context,
+    write_context_file,
+)
+
+MANIFEST_FILE = 'manifesto_contexto.json'
+SNAPSHOT_DIR = 'snapshot_contexto'
+STRUCTURE_KEY = 'Estrutura do projeto'
+
+def _hash(text):
+    """Retorna o hash SHA-256 de um texto"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def get_manifest_path(root_dir):
+    """Retorna o caminho do manifesto do último contexto completo enviado"""
+    return os.path.join(root_dir, '.codeai', MANIFEST_FILE)
+
+
+def load_manifest(root_dir):
+    """Carrega o manifesto do último contexto completo, ou None se não existir"""
+    manifest_path = get_manifest_path(root_dir)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_snapshot(root_dir, turno, blocks, structure_text):
+    """Grava o manifesto (caminho -> hash) e o conteúdo dos blocos enviados, endereçado pelo hash"""
+    snapshot_dir = os.path.join(root_dir, '.codeai', SNAPSHOT_DIR)
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    os.makedirs(snapshot_dir)
+
+    arquivos = {}
+    for display_path, block in list(blocks) + [(STRUCTURE_KEY, structure_text)]:
+        digest = _hash(block)
+        arquivos[display_path] = digest
+        with open(os.path.join(snapshot_dir, digest), 'w', encoding='utf-8') as f:
+            f.write(block)
+
+    manifest = {'turno': turno, 'arquivos': arquivos}
+    with open(get_manifest_path(root_dir), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def _load_snapshot_block(root_dir, digest):
+    """Lê um bloco do snapshot, ou None se ele não estiver disponível"""
+    path = os.path.join(root_dir, '.codeai', SNAPSHOT_DIR, digest)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def build_context_delta(root_dir, manifest, blocks, structure_text):
+    """Monta a mensagem com os arquivos novos ou alterados desde o manifesto e a lista dos inalterados"""
+    previous = dict(manifest['arquivos'])
+    previous_structure = previous.pop(STRUCTURE_KEY, None)
+    changed, unchanged = [], []
+
+    for display_path, block in blocks:
+        digest = previous.pop(display_path, None)
+        if digest == _hash(block):
+            unchanged.append(display_path)
+            continue
+        old_block = _load_snapshot_block(root_dir, digest) if digest else None
+        if old_block is None:
+            changed.append(block)
+            continue
+        diff = ''.join(difflib.unified_diff(
+            old_block.splitlines(keepends=True), block.splitlines(keepends=True),
+            fromfile=display_path, tofile=display_path))
+        # Envia o conteúdo completo quando o diff não for menor que ele
+        if len(diff) < len(block):
+            changed.append(f"\n--- Diff de {display_path} ---\n{diff}")
+        else:
+            changed.append(block)
+
+    lines = [f"Modo diferencial: o contexto completo foi enviado na interação {manifest['turno']}. Alterações desde então:"]
+    lines.extend(block.rstrip("\n") for block in changed)
+    if previous:
+        lines.append(f"\nArquivos removidos do contexto: {', '.join(sorted(previous))}")
+    if unchanged:
+        lines.append(f"\nArquivos sem alterações: {', '.join(unchanged)}")
+    if not changed and not previous:
+        lines.append("\nNenhum arquivo foi alterado.")
+    if previous_structure != _hash(structure_text):
+        lines.append(f"\nEstrutura do projeto (atualizada):\n\n{structure_text}")
+    return "\n".join(lines) + "\n"
+
+
+def prepare_differential_context(root_dir, conversa_path, turno, controle_de_historico, context_data=None, file_cache=None, dir_manifest=None):
+    """Prepara o contexto do modo diferencial para a interação atual.
+
+    Se o contexto completo registrado no manifesto ainda está dentro do controle_de_historico, retorna
+    apenas as alterações desde ele. Caso contrário, grava o contexto completo em '{turno}_contexto.md',
+    que passa a fazer parte do histórico carregado por load_conversation, e retorna None.
+    """
+    if context_data is None:
+        context_data = load_context(root_dir)
+    own_manifest = dir_manifest is None
+    if own_manifest:
+        dir_manifest = DirectoryManifest(root_dir)
+    blocks, structure = collect_context(root_dir, context_data, file_cache, dir_manifest)
+    if own_manifest:
+        dir_manifest.save()
+    structure_text = "".join(f"{line}\n" for line in structure)
+
+    manifest = load_manifest(root_dir)
+    if manifest is not None:
+        base_turno = manifest['turno']
+        base_file = f"{base_turno}_contexto.md"
+        if base_turno >= turno - controle_de_historico and has_turn_file(conversa_path, base_file):
+            return build_context_delta(root_dir, manifest, blocks, structure_text)
+
+    # O contexto anterior saiu do histórico: registra um novo contexto completo
+    context_file_path = os.path.join(conversa_path, f"{turno}_contexto.md")
+    write_context_file(context_file_path, context_data, blocks, structure)
+    save_snapshot(root_dir, turno, blocks, structure_text)
+    return None
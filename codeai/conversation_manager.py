@@ -1,62 +1,198 @@
+import io
 import os
+import gzip
 import json
-import yaml
+import time
+from codeai.output import VERBOSO, emit_event, log
 
 CONVERSA_DIR = 'conversa'
 SYSTEM_FILE = 'system_message.md'
-CONFIG_FILE = 'config.yml'
 
-def load_config(root_dir):
-    """Carrega as configurações do arquivo config.yml"""
-    config_path = os.path.join(root_dir, '.codeai', CONFIG_FILE)
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+# Ordem dos arquivos de uma mesma interação
+TURN_FILE_ORDER = {'contexto.md': 0, 'mensagem.md': 1, 'resposta.md': 2}
+
+# Arquivamento de interações antigas em segmentos compactados
+ARCHIVE_DIR = 'arquivo'
+ARCHIVE_INDEX = 'indice.json'
+SEGMENT_TURNS = 20
+SEGMENT_EXTENSIONS = {'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}
+
+# Conteúdo dos arquivos de mensagem criados automaticamente, ainda não escritos pelo usuário
+MENSAGEM_INICIAL = "# Escreva sua mensagem aqui e salve o arquivo.\n"
+PROXIMA_MENSAGEM = "# Escreva sua próxima mensagem aqui e salve o arquivo.\n"
+
+def parse_turn_file(file_name):
+    """Retorna (número da interação, tipo) de um arquivo da conversa, ou None se não for um arquivo de interação"""
+    number, _, kind = file_name.partition('_')
+    if not number.isdigit() or kind not in TURN_FILE_ORDER:
+        return None
+    return int(number), kind
+
+
+def list_turn_files(conversa_path):
+    """Lista os arquivos de interação em ordem: por número e, no mesmo número, contexto, mensagem e resposta"""
+    files = [f for f in os.listdir(conversa_path) if parse_turn_file(f) is not None]
+    return sorted(files, key=turn_sort_key)
+
+
+def get_current_turn(conversa_path):
+    """Retorna o número da última mensagem do usuário na conversa"""
+    numbers = [parse_turn_file(f)[0] for f in list_turn_files(conversa_path) if f.endswith('_mensagem.md')]
+    return max(numbers) if numbers else 0
+
+
+def turn_sort_key(file_name):
+    """Chave de ordenação dos arquivos de interação"""
+    number, kind = parse_turn_file(file_name)
+    return number, TURN_FILE_ORDER[kind]
+
+
+def get_archive_path(conversa_path):
+    """Retorna o diretório dos segmentos compactados da conversa"""
+    return os.path.join(conversa_path, ARCHIVE_DIR)
+
+
+def load_archive_index(conversa_path):
+    """Carrega o índice dos segmentos compactados (lista de segmentos com a faixa de interações e os arquivos)"""
+    index_path = os.path.join(get_archive_path(conversa_path), ARCHIVE_INDEX)
+    if not os.path.exists(index_path):
+        return []
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def has_turn_file(conversa_path, file_name):
+    """Verifica se o arquivo de interação existe na pasta da conversa ou em um segmento compactado"""
+    if os.path.exists(os.path.join(conversa_path, file_name)):
+        return True
+    return any(file_name in segment['arquivos'] for segment in load_archive_index(conversa_path))
+
+
+def _open_segment(path, mode):
+    """Abre um segmento compactado com gzip ou zstd, de acordo com a extensão"""
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("O pacote 'zstandard' é necessário para segmentos .zst. Instale com 'pip install zstandard'.")
+        if 'w' in mode:
+            return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, 'wb')), encoding='utf-8')
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')), encoding='utf-8')
+    return gzip.open(path, mode + 't', encoding='utf-8')
+
+
+def _read_archived_turns(conversa_path, first_interaction_num):
+    """Descompacta apenas os segmentos que contêm interações a partir do número informado"""
+    archive_path = get_archive_path(conversa_path)
+    for segment in load_archive_index(conversa_path):
+        if segment['ultima'] < first_interaction_num:
+            continue
+        with _open_segment(os.path.join(archive_path, segment['segmento']), 'r') as f:
+            for line in f:
+                entry = json.loads(line)
+                if parse_turn_file(entry['nome'])[0] >= first_interaction_num:
+                    yield entry['nome'], entry['conteudo']
+
 
 def load_conversation(conversa_path, controle_de_historico):
     """Carrega o histórico da conversa com base no controle de histórico"""
     conversation = []
-    files = sorted(os.listdir(conversa_path), key=lambda f: int(f.split('_')[0]))
+    files = list_turn_files(conversa_path)
 
     # Pega o número da última interação para limitar o histórico carregado
-    current_interaction_num = int(files[-1].split('_')[0])
-
-    # Verifica o limite de histórico a ser carregado
-    if controle_de_historico >= current_interaction_num:
-        # Carrega todo o histórico se controle_de_historico >= número atual da interação
-        for file in files:
-            file_path = os.path.join(conversa_path, file)
-            if file.endswith('_mensagem.md'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    conversation.append({
-                        "role": "user",
-                        "content": f.read().strip()
-                    })
-            elif file.endswith('_resposta.md'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    conversation.append({
-                        "role": "assistant",
-                        "content": f.read().strip()
-                    })
-    else:
-        # Carrega apenas o histórico limitado pelo controle_de_historico
-        start_idx = max(0, len(files) - 2 * controle_de_historico - 1)
-        for file in files[start_idx:]:
-            file_path = os.path.join(conversa_path, file)
-            if file.endswith('_mensagem.md'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    conversation.append({
-                        "role": "user",
-                        "content": f.read().strip()
-                    })
-            elif file.endswith('_resposta.md'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    conversation.append({
-                        "role": "assistant",
-                        "content": f.read().strip()
-                    })
+    current_interaction_num = parse_turn_file(files[-1])[0]
+
+    # Carrega apenas as interações dentro do controle_de_historico (todas se ele for >= número atual)
+    first_interaction_num = current_interaction_num - controle_de_historico
+    contents = {}
+    for file in files:
+        if parse_turn_file(file)[0] < first_interaction_num:
+            continue
+        with open(os.path.join(conversa_path, file), 'r', encoding='utf-8') as f:
+            contents[file] = f.read()
+    for file, content in _read_archived_turns(conversa_path, first_interaction_num):
+        contents.setdefault(file, content)
+
+    for file in sorted(contents, key=turn_sort_key):
+        content = contents[file].strip()
+        if file.endswith('_mensagem.md'):
+            conversation.append({"role": "user", "content": content})
+        elif file.endswith('_resposta.md'):
+            conversation.append({"role": "assistant", "content": content})
+        elif file.endswith('_contexto.md'):
+            # Contexto completo registrado pelo modo diferencial
+            conversation.append({"role": "system", "content": f"Contexto adicional: {content}"})
 
     return conversation
 
+
+def archive_conversation(conversa_path, controle_de_historico=None, max_age_days=None, compression='gzip'):
+    """Compacta em segmentos as interações fora do controle_de_historico ou mais antigas que max_age_days.
+
+    A interação atual nunca é compactada. Retorna os números das interações compactadas.
+    """
+    if compression not in SEGMENT_EXTENSIONS:
+        raise ValueError(f"Compactação desconhecida: {compression}. Use 'gzip' ou 'zstd'.")
+
+    files = list_turn_files(conversa_path)
+    if not files:
+        return []
+    current_interaction_num = get_current_turn(conversa_path)
+    cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+
+    turns = {}
+    for file in files:
+        turns.setdefault(parse_turn_file(file)[0], []).append(file)
+
+    archived = []
+    for number, turn_files in sorted(turns.items()):
+        if number >= current_interaction_num:
+            continue
+        outside_window = controle_de_historico is not None and number < current_interaction_num - controle_de_historico
+        too_old = cutoff is not None and all(os.path.getmtime(os.path.join(conversa_path, f)) < cutoff for f in turn_files)
+        if outside_window or too_old:
+            archived.append(number)
+
+    archive_path = get_archive_path(conversa_path)
+    os.makedirs(archive_path, exist_ok=True)
+    index = load_archive_index(conversa_path)
+
+    for start in range(0, len(archived), SEGMENT_TURNS):
+        numbers = archived[start:start + SEGMENT_TURNS]
+        segment_files = [f for number in numbers for f in turns[number]]
+        segment_name = f"segmento_{numbers[0]}-{numbers[-1]}{SEGMENT_EXTENSIONS[compression]}"
+        suffix = 1
+        while os.path.exists(os.path.join(archive_path, segment_name)):
+            suffix += 1
+            segment_name = f"segmento_{numbers[0]}-{numbers[-1]}_{suffix}{SEGMENT_EXTENSIONS[compression]}"
+
+        # Grava o segmento em um arquivo temporário para não deixar segmentos incompletos
+        segment_path = os.path.join(archive_path, segment_name)
+        with _open_segment(segment_path + '.tmp' + SEGMENT_EXTENSIONS[compression], 'w') as f:
+            for file in segment_files:
+                with open(os.path.join(conversa_path, file), 'r', encoding='utf-8') as turn_file:
+                    f.write(json.dumps({'nome': file, 'conteudo': turn_file.read()}) + "\n")
+        os.replace(segment_path + '.tmp' + SEGMENT_EXTENSIONS[compression], segment_path)
+
+        index.append({'segmento': segment_name, 'primeira': numbers[0], 'ultima': numbers[-1], 'arquivos': segment_files})
+        with open(os.path.join(archive_path, ARCHIVE_INDEX), 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+
+        for file in segment_files:
+            os.remove(os.path.join(conversa_path, file))
+
+    return archived
+
+def read_draft_message(message_file):
+    """Retorna o rascunho escrito no arquivo de mensagem, ou None se ele não existir ou tiver apenas o texto inicial"""
+    if not os.path.exists(message_file):
+        return None
+    with open(message_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if content.strip() in ('', MENSAGEM_INICIAL.strip(), PROXIMA_MENSAGEM.strip()):
+        return None
+    return content
+
 def initialize_conversation(root_dir):
     """Inicializa a pasta de conversa e o arquivo de system dentro de .codeai"""
     codeai_dir = os.path.join(root_dir, '.codeai')
@@ -74,9 +210,9 @@ def initialize_conversation(root_dir):
 
     # Cria o primeiro arquivo de mensagem
     first_message_file = os.path.join(conversa_path, "1_mensagem.md")
-    if not os.path.exists(first_message_file):
+    if not has_turn_file(conversa_path, "1_mensagem.md"):
         with open(first_message_file, 'w', encoding='utf-8') as msg_file:
-            msg_file.write("# Escreva sua mensagem aqui e salve o arquivo.\n")
+            msg_file.write(MENSAGEM_INICIAL)
 
     return system_path, conversa_path
 
@@ -93,7 +229,8 @@ def save_response(conversa_path, response, last_user_message_file):
     with open(response_file, 'w', encoding='utf-8') as resp_file:
         resp_file.write(response)
 
-    print(f"[LOG] Resposta salva no arquivo: {response_file}")
+    log(f"[LOG] Resposta salva no arquivo: {response_file}")
+    emit_event('resposta_salva', arquivo=response_file)
 
     # Criar o próximo arquivo de mensagem numerado
     next_message_num = response_num + 1
@@ -101,6 +238,6 @@ def save_response(conversa_path, response, last_user_message_file):
     
     # Sempre cria o próximo arquivo, independentemente de ser mensagem 9 ou qualquer outra
     with open(next_message_file, 'w', encoding='utf-8') as msg_file:
-        msg_file.write("# Escreva sua próxima mensagem aqui e salve o arquivo.\n")
+        msg_file.write(PROXIMA_MENSAGEM)
     
-    print(f"[LOG] Próximo arquivo de mensagem criado: {next_message_file}")
+    log(f"[LOG] Próximo arquivo de mensagem criado: {next_message_file}", VERBOSO)
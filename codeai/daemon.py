@@ -0,0 +1,186 @@
+import os
+import json
+import socket
+import socketserver
+import threading
+from codeai.directory_walker import DirectoryManifest
+from codeai.output import RESUMO, log, get_level, json_events_enabled, capture_output, replay_output
+from codeai.config import load_project_config
+from codeai.hedging import get_sender
+from codeai.messaging import processar_envio
+from codeai.context_manager import (
+    get_root_dirs,
+    for_root,
+    iter_context_files,
+    read_context_file,
+    create_context_file,
+)
+
+SOCKET_FILE = 'daemon.sock'
+INTERVALO_ATUALIZACAO = 2.0  # Segundos entre as varreduras do índice de arquivos
+
+def get_socket_path(root_dir):
+    """Retorna o caminho do socket Unix do daemon dentro do diretório .codeai"""
+    return os.path.join(root_dir, '.codeai', SOCKET_FILE)
+
+
+class ProjectState:
+    """Estado mantido em memória pelo daemon: configuração já interpretada e índice de arquivos do contexto"""
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.lock = threading.Lock()
+        self.config = None
+        self.file_cache = {}
+        self.dir_manifest = DirectoryManifest(root_dir)
+        self.refresh()
+        self._preload_connector()
+
+    def refresh(self):
+        """Recarrega a configuração se os arquivos mudaram e atualiza o índice de arquivos"""
+        with self.lock:
+            self._reload_config()
+
+            # Lê arquivos novos ou alterados e descarta os que saíram do contexto
+            seen = set()
+            context_data = self.config.context
+            for pasta_raiz in get_root_dirs(context_data):
+                root_context = for_root(context_data, pasta_raiz)
+                for abs_file_path, _ in iter_context_files(root_context, self.dir_manifest):
+                    seen.add(abs_file_path)
+                    try:
+                        # Recortes e arquivos acima do limite de tamanho não ficam no cache
+                        read_context_file(abs_file_path, root_context, self.file_cache)
+                    except (UnicodeDecodeError, OSError):
+                        self.file_cache.pop(abs_file_path, None)
+            for path in list(self.file_cache):
+                if path not in seen:
+                    del self.file_cache[path]
+            self.dir_manifest.save()
+
+    def _reload_config(self):
+        """Recarrega a configuração se .codeai_context ou config.yml mudaram; deve ser chamado com o lock"""
+        if self.config is None or not self.config.is_current():
+            self.config = load_project_config(self.root_dir)
+
+    def _preload_connector(self):
+        """Importa o conector do modelo configurado para manter o cliente HTTP aberto entre os envios"""
+        try:
+            get_sender(self.config.modelo)
+        except ImportError:
+            pass  # O erro aparecerá no primeiro envio, como na execução sem daemon
+
+    def handle(self, comando):
+        """Executa um comando recebido pelo socket e retorna o resultado"""
+        if comando == 'ping':
+            return 'pong'
+        if comando == 'contexto':
+            with self.lock:
+                self._reload_config()  # Não espera a próxima varredura para usar uma configuração editada
+                return create_context_file(self.root_dir, self.config.context, self.file_cache, self.dir_manifest)
+        if comando == 'enviar':
+            with self.lock:
+                self._reload_config()
+                return processar_envio(self.root_dir, self.config, self.file_cache, self.dir_manifest)
+        raise ValueError(f"Comando desconhecido: {comando}")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Atende um pedido JSON por conexão e responde com uma linha JSON.
+
+    O texto e os eventos do comando são gerados com o nível e o modo JSON do cliente e devolvidos
+    na resposta, para que apareçam no terminal de quem chamou e não no do daemon.
+    """
+
+    def handle(self):
+        try:
+            pedido = json.loads(self.rfile.readline().decode('utf-8'))
+        except ValueError as e:
+            self._reply({'ok': False, 'erro': str(e), 'saida': []})
+            return
+
+        with capture_output(pedido.get('nivel', RESUMO), pedido.get('eventos_json', False)) as saida:
+            try:
+                comando = pedido.get('comando')
+                if comando == 'parar':
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    resposta = {'ok': True, 'resultado': 'parando'}
+                else:
+                    resposta = {'ok': True, 'resultado': self.server.state.handle(comando)}
+            except Exception as e:
+                resposta = {'ok': False, 'erro': str(e)}
+        resposta['saida'] = saida
+        self._reply(resposta)
+
+    def _reply(self, resposta):
+        self.wfile.write((json.dumps(resposta) + '\n').encode('utf-8'))
+
+
+def send_command(root_dir, comando):
+    """Envia um comando ao daemon do projeto e reproduz a saída dele.
+
+    Retorna None apenas se não houver daemon ativo (sem socket ou conexão recusada). Depois que o pedido é enviado,
+    uma falha levanta RuntimeError: o daemon pode já ter executado o comando, e repeti-lo localmente poderia
+    duplicar um envio ao provedor.
+    """
+    socket_path = get_socket_path(root_dir)
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+        return None
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return None  # Socket órfão de um daemon que não está mais em execução
+
+        try:
+            pedido = {'comando': comando, 'nivel': get_level(), 'eventos_json': json_events_enabled()}
+            sock.sendall((json.dumps(pedido) + '\n').encode('utf-8'))
+            data = sock.makefile('rb').readline()
+        except OSError as e:
+            raise RuntimeError(f"O daemon encerrou a conexão durante o comando '{comando}': {e}") from e
+
+    if not data:
+        raise RuntimeError(f"O daemon encerrou a conexão durante o comando '{comando}' sem responder.")
+    resposta = json.loads(data.decode('utf-8'))
+    replay_output(resposta.get('saida', []))
+    if not resposta.get('ok'):
+        raise RuntimeError(f"Erro no daemon: {resposta.get('erro')}")
+    return resposta.get('resultado')
+
+
+def run_daemon(root_dir, intervalo=INTERVALO_ATUALIZACAO):
+    """Executa o daemon do projeto até receber o comando 'parar'"""
+    if not hasattr(socket, 'AF_UNIX'):
+        raise RuntimeError("O daemon requer suporte a sockets Unix neste sistema.")
+
+    socket_path = get_socket_path(root_dir)
+    if os.path.exists(socket_path):
+        if send_command(root_dir, 'ping') is not None:
+            raise RuntimeError(f"Já existe um daemon em execução em {socket_path}")
+        os.remove(socket_path)  # Remove o socket órfão
+
+    state = ProjectState(root_dir)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, _RequestHandler)
+    server.state = state
+
+    # Mantém o índice atualizado em segundo plano
+    stop = threading.Event()
+
+    def watch():
+        while not stop.wait(intervalo):
+            try:
+                state.refresh()
+            except Exception as e:
+                log(f"[LOG] Falha ao atualizar o índice do daemon: {e}")
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+
+MANIFEST_FILE = 'manifesto_diretorios.json'
+# Diretórios alterados há menos que isso não são guardados: outra alteração no mesmo
+# intervalo de resolução do mtime passaria despercebida
+MARGEM_MTIME_NS = 2 * 10**9
+
+def get_manifest_path(root_dir):
+    """Retorna o caminho do manifesto de diretórios dentro do diretório .codeai"""
+    return os.path.join(root_dir, '.codeai', MANIFEST_FILE)
+
+
+class DirectoryManifest:
+    """Listagens de diretórios (mtime_ns, subdiretórios, arquivos) reaproveitadas entre execuções"""
+
+    def __init__(self, root_dir=None):
+        self.root_dir = root_dir
+        self.entries = {}
+        self.seen = set()
+        self.changed = False
+        if root_dir is not None:
+            manifest_path = get_manifest_path(root_dir)
+            if os.path.exists(manifest_path):
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        self.entries = json.load(f)
+                except (OSError, ValueError):
+                    self.entries = {}
+
+    def listdir(self, dirpath):
+        """Retorna (subdiretórios, arquivos) do diretório, listando-o apenas se o mtime mudou"""
+        mtime_ns = os.stat(dirpath).st_mtime_ns
+        self.seen.add(dirpath)
+        cached = self.entries.get(dirpath)
+        if cached is not None and cached[0] == mtime_ns:
+            return list(cached[1]), list(cached[2])
+
+        dirnames, filenames = _scan(dirpath)
+        if time.time() * 10**9 - mtime_ns > MARGEM_MTIME_NS:
+            self.entries[dirpath] = [mtime_ns, dirnames, filenames]
+        else:
+            self.entries.pop(dirpath, None)
+        self.changed = True
+        return list(dirnames), list(filenames)
+
+    def for_subtree(self, top):
+        """Retorna um manifesto avulso com as listagens de top e seus subdiretórios, para uso em outro processo"""
+        subtree = DirectoryManifest()
+        prefix = os.path.join(top, '')
+        subtree.entries = {dirpath: entry for dirpath, entry in self.entries.items()
+                           if dirpath == top or dirpath.startswith(prefix)}
+        return subtree
+
+    def merge(self, other):
+        """Incorpora as listagens visitadas por um manifesto avulso (ver for_subtree)"""
+        for dirpath in other.seen:
+            if dirpath in other.entries:
+                self.entries[dirpath] = other.entries[dirpath]
+            else:
+                self.entries.pop(dirpath, None)
+        self.seen |= other.seen
+        self.changed = self.changed or other.changed
+
+    def save(self):
+        """Grava o manifesto, mantendo apenas os diretórios visitados nesta execução"""
+        if self.root_dir is None:
+            return
+        stale = [dirpath for dirpath in self.entries if dirpath not in self.seen]
+        if not self.changed and not stale:
+            return
+        for dirpath in stale:
+            del self.entries[dirpath]
+        with open(get_manifest_path(self.root_dir), 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        self.changed = False
+
+
+def _scan(dirpath):
+    """Lista um diretório com os.scandir, usando o tipo já informado por cada DirEntry"""
+    dirnames, filenames = [], []
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                filenames.append(entry.name)
+            elif not entry.is_symlink():
+                dirnames.append(entry.name)  # Como no os.walk, links para diretórios não são percorridos
+    return dirnames, filenames
+
+
+def walk_directory(top, manifest=None):
+    """Percorre a árvore como os.walk(top) (de cima para baixo), usando os.scandir e o manifesto, se informado.
+
+    Quem chama pode alterar a lista de subdiretórios para não descer neles, como no os.walk.
+    """
+    stack = [top]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            if manifest is not None:
+                dirnames, filenames = manifest.listdir(dirpath)
+            else:
+                dirnames, filenames = _scan(dirpath)
+        except OSError:
+            continue
+        yield dirpath, dirnames, filenames
+        stack.extend(os.path.join(dirpath, dirname) for dirname in reversed(dirnames))
@@ -0,0 +1,166 @@
+import os
+import re
+
+LIMITE_TAMANHO_PADRAO = 256 * 1024  # Arquivos maiores que isso (em bytes) são enviados com início e fim
+BLOCO_LEITURA = 64 * 1024
+
+# Recortes aceitos nas entradas de 'adicionar': 'arquivo:+N' (primeiras N linhas),
+# 'arquivo:-N' (últimas N linhas) e 'arquivo:A-B' (linhas A a B, contadas a partir de 1)
+_SLICE_PATTERN = re.compile(r"^(?P<path>.+):(?:\+(?P<inicio>\d+)|-(?P<fim>\d+)|(?P<de>\d+)-(?P<ate>\d+))$")
+_SIZE_PATTERN = re.compile(r"^(\d+)\s*([kmg]?)b?$", re.IGNORECASE)
+_SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+def parse_slice(entry):
+    """Separa uma entrada de 'adicionar' em (caminho, recorte), com recorte None se não houver um"""
+    match = _SLICE_PATTERN.match(entry)
+    if match is None:
+        return entry, None
+    if match.group('inicio') is not None:
+        return match.group('path'), ('inicio', int(match.group('inicio')))
+    if match.group('fim') is not None:
+        return match.group('path'), ('fim', int(match.group('fim')))
+    start, end = int(match.group('de')), int(match.group('ate'))
+    if start < 1 or end < start:
+        raise ValueError(f"Intervalo de linhas inválido em '{entry}'.")
+    return match.group('path'), ('linhas', start, end)
+
+
+def parse_size(value):
+    """Converte um tamanho como '262144', '256k' ou '1MB' em bytes"""
+    match = _SIZE_PATTERN.match(value.strip())
+    if match is None:
+        raise ValueError(f"Tamanho inválido: '{value}'.")
+    return int(match.group(1)) * _SIZE_UNITS[match.group(2).lower()]
+
+
+def describe_slice(spec):
+    """Descreve o recorte para o cabeçalho do bloco no contexto"""
+    if spec[0] == 'inicio':
+        return f"primeiras {spec[1]} linhas"
+    if spec[0] == 'fim':
+        return f"últimas {spec[1]} linhas"
+    return f"linhas {spec[1]}-{spec[2]}"
+
+
+def _decode(data):
+    """Decodifica um trecho UTF-8, descartando um caractere cortado no início ou no fim do trecho"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        pass
+    start = 0
+    while start < min(3, len(data)) and data[start] & 0xC0 == 0x80:
+        start += 1  # Bytes de continuação de um caractere que começou antes do trecho
+    data = data[start:]
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.reason == 'unexpected end of data' and e.start >= len(data) - 3:
+            return data[:e.start].decode('utf-8')
+        raise
+
+
+def _truncation_note(limit):
+    """Aviso incluído quando um recorte é cortado pelo limite de bytes"""
+    return f"[... trecho limitado a {limit} bytes ...]"
+
+
+def _skip_lines(f, count):
+    """Avança 'count' linhas lendo blocos limitados, sem carregar linhas longas inteiras na memória"""
+    skipped = 0
+    while skipped < count:
+        chunk = f.readline(BLOCO_LEITURA)
+        if not chunk:
+            return
+        if chunk.endswith(b"\n"):
+            skipped += 1
+
+
+def _read_lines(f, count, limit):
+    """Lê até 'count' linhas a partir da posição atual, parando em 'limit' bytes (sem limite se None)"""
+    parts, size, lines = [], 0, 0
+    while lines < count:
+        budget = BLOCO_LEITURA if limit is None else min(BLOCO_LEITURA, limit - size)
+        if budget <= 0:
+            truncated = bool(f.read(1))  # Ainda havia conteúdo dentro das linhas pedidas
+            text = _decode(b"".join(parts))
+            return f"{text}\n{_truncation_note(limit)}\n" if truncated else text
+        chunk = f.readline(budget)
+        if not chunk:
+            break
+        parts.append(chunk)
+        size += len(chunk)
+        if chunk.endswith(b"\n"):
+            lines += 1
+    return _decode(b"".join(parts))
+
+
+def read_head(file_path, count, limit=None):
+    """Lê as primeiras 'count' linhas do arquivo, com no máximo 'limit' bytes"""
+    with open(file_path, 'rb') as f:
+        return _read_lines(f, count, limit)
+
+
+def read_range(file_path, start, end, limit=None):
+    """Lê as linhas de 'start' a 'end' (inclusive, contadas a partir de 1), com no máximo 'limit' bytes"""
+    with open(file_path, 'rb') as f:
+        _skip_lines(f, start - 1)
+        return _read_lines(f, end - start + 1, limit)
+
+
+def read_tail(file_path, count, limit=None):
+    """Lê as últimas 'count' linhas do arquivo, lendo blocos a partir do fim, com no máximo 'limit' bytes"""
+    with open(file_path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        chunks, newlines, collected = [], 0, 0
+        # São necessárias count + 1 quebras de linha para garantir que a primeira linha está completa;
+        # com limite, a leitura para assim que passar de 'limit' bytes
+        while position > 0 and newlines <= count and (limit is None or collected <= limit):
+            size = min(BLOCO_LEITURA, position)
+            position -= size
+            f.seek(position)
+            chunk = f.read(size)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+            collected += size
+    lines = b"".join(reversed(chunks)).splitlines(keepends=True)
+    data = b"".join(lines[-count:] if count else [])
+    if limit is None or len(data) <= limit:
+        return _decode(data)
+
+    # Mantém os últimos 'limit' bytes, começando em uma linha inteira quando possível
+    data = data[-limit:]
+    cut = data.find(b"\n")
+    if cut != -1 and cut + 1 < len(data):
+        data = data[cut + 1:]
+    return f"{_truncation_note(limit)}\n{_decode(data)}"
+
+
+def read_slice(file_path, spec, limit=None):
+    """Lê o recorte do arquivo descrito por parse_slice, com no máximo 'limit' bytes"""
+    if spec[0] == 'inicio':
+        return read_head(file_path, spec[1], limit)
+    if spec[0] == 'fim':
+        return read_tail(file_path, spec[1], limit)
+    return read_range(file_path, spec[1], spec[2], limit)
+
+
+def read_excerpt(file_path, limit):
+    """Lê o início e o fim de um arquivo grande, cada um com até metade de 'limit' bytes e cortados em linhas inteiras"""
+    half = max(limit // 2, 1)
+    with open(file_path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(0)
+        head = f.read(half)
+        f.seek(max(size - half, len(head)))
+        tail = f.read()
+
+    # Descarta a linha incompleta no fim do início e no começo do fim, se houver linhas inteiras
+    cut = head.rfind(b"\n")
+    if cut != -1:
+        head = head[:cut + 1]
+    cut = tail.find(b"\n")
+    if cut != -1 and cut + 1 < len(tail):
+        tail = tail[cut + 1:]
+    omitted = size - len(head) - len(tail)
+    return f"{_decode(head)}\n[... {omitted} bytes omitidos ...]\n{_decode(tail)}"
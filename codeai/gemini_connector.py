@@ -1,5 +1,6 @@
 import os
 import google.generativeai as genai
+from codeai.output import log_request, log_response
 
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
@@ -9,18 +10,13 @@ def send_message_to_gemini(conversation):
         model = genai.GenerativeModel("gemini-1.5-flash")
         full_conversation = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in conversation])
 
-        print("Mensagem enviada para o Gemini:")
-        print(full_conversation)
-        print("="*50)  # Linha separadora
+        log_request("Gemini", conversation, prompt=full_conversation)
 
         # Enviar a mensagem concatenada para o modelo
         response = model.generate_content(full_conversation)
 
-        print("Resposta recebida do Gemini:")
-        print(response.text)
-        print("="*50)  # Linha separadora
+        log_response("Gemini", response.text)
 
-        
         return response.text
 
     except Exception as e:
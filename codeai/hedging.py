@@ -0,0 +1,118 @@
+import os
+import json
+import math
+import time
+import queue
+import threading
+from codeai.output import capture_output, get_level, json_events_enabled, replay_output
+
+LATENCIAS_FILE = 'latencias.json'
+ATRASO_PADRAO = 5.0  # Segundos de espera pelo modelo principal antes de disparar o alternativo
+MAX_AMOSTRAS = 50
+MIN_AMOSTRAS = 5
+
+def get_sender(model):
+    """Retorna a função que envia a conversa ao provedor do modelo"""
+    if model == 'gemini-1.5-flash':
+        from codeai.gemini_connector import send_message_to_gemini
+        return send_message_to_gemini
+    from codeai.openai_connector import send_message_to_openai
+    return lambda conversation: send_message_to_openai(conversation, model)
+
+
+def get_latencies_path(root_dir):
+    """Retorna o caminho do histórico de latências dentro do diretório .codeai"""
+    return os.path.join(root_dir, '.codeai', LATENCIAS_FILE)
+
+
+def load_latencies(root_dir):
+    """Carrega as latências recentes (em segundos) de cada modelo"""
+    latencies_path = get_latencies_path(root_dir)
+    if not os.path.exists(latencies_path):
+        return {}
+    try:
+        with open(latencies_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_latencies(root_dir, samples):
+    """Registra as latências (modelo -> segundos) de um envio, mantendo apenas as amostras mais recentes"""
+    latencies = load_latencies(root_dir)
+    for model, seconds in samples.items():
+        model_samples = latencies.setdefault(model, [])
+        model_samples.append(round(seconds, 3))
+        del model_samples[:-MAX_AMOSTRAS]
+    with open(get_latencies_path(root_dir), 'w', encoding='utf-8') as f:
+        json.dump(latencies, f)
+
+
+def resolve_delay(root_dir, model, atraso_hedge=ATRASO_PADRAO):
+    """Retorna o atraso do hedge: o valor configurado ou, com 'auto', o p95 das latências do modelo"""
+    if atraso_hedge != 'auto':
+        return float(atraso_hedge)
+    samples = sorted(load_latencies(root_dir).get(model, []))
+    if len(samples) < MIN_AMOSTRAS:
+        return ATRASO_PADRAO
+    return samples[math.ceil(len(samples) * 0.95) - 1]  # p95 pelo método do posto mais próximo
+
+
+def send_with_hedging(conversation, models, delay, get_sender=get_sender):
+    """Envia ao primeiro modelo e dispara o próximo se não houver resposta em 'delay' segundos (ou se ele falhar).
+
+    A primeira resposta concluída vence e as demais são descartadas. As requisições rodam em threads daemon,
+    então uma requisição perdedora não impede o encerramento do processo.
+    Retorna (modelo vencedor, resposta, latências), com as latências em segundos desde o disparo de cada modelo
+    que não falhou. Para os que ainda não responderam, o valor é o tempo decorrido até a vitória: um limite
+    inferior que mantém os modelos lentos no histórico usado por resolve_delay.
+
+    A saída de cada requisição é capturada com as opções de saída de quem chamou e reproduzida quando ela termina;
+    a das requisições que ainda estão em andamento quando um modelo vence é descartada.
+    """
+    results = queue.Queue()
+    launched_at = {}
+    nivel, json_events = get_level(), json_events_enabled()
+
+    def run(model, sender):
+        start = time.monotonic()
+        with capture_output(nivel, json_events) as saida:
+            try:
+                results.put((model, sender(conversation), None, time.monotonic() - start, saida))
+            except Exception as e:
+                results.put((model, None, e, time.monotonic() - start, saida))
+
+    def launch(model):
+        launched_at[model] = time.monotonic()
+        threading.Thread(target=run, args=(model, get_sender(model)), daemon=True).start()
+
+    launch(models[0])
+    launched, running = 1, 1
+    errors = []
+    failed = set()
+    while running:
+        timeout = delay if launched < len(models) else None
+        try:
+            model, response, error, elapsed, saida = results.get(timeout=timeout)
+        except queue.Empty:
+            # O modelo atual demorou: dispara o próximo sem cancelar os que já estão em andamento
+            launch(models[launched])
+            launched += 1
+            running += 1
+            continue
+
+        running -= 1
+        replay_output(saida)
+        if error is None:
+            now = time.monotonic()
+            latencies = {other: now - start for other, start in launched_at.items() if other not in failed}
+            latencies[model] = elapsed
+            return model, response, latencies
+        failed.add(model)
+        errors.append(f"{model}: {error}")
+        if launched < len(models):
+            launch(models[launched])
+            launched += 1
+            running += 1
+
+    raise RuntimeError(f"Nenhum modelo respondeu. Erros: {'; '.join(errors)}")
@@ -0,0 +1,97 @@
+import os
+import json
+from codeai.config import load_project_config
+from codeai.context_manager import create_context_file
+from codeai.context_snapshot import prepare_differential_context
+from codeai.conversation_manager import (
+    initialize_conversation,
+    save_response,
+    load_conversation,
+    get_current_turn,
+    archive_conversation,
+)
+from codeai.output import log
+from codeai.hedging import ATRASO_PADRAO, get_sender, resolve_delay, record_latencies, send_with_hedging
+
+def montar_conversa(root_dir, config=None, file_cache=None, dir_manifest=None):
+    """Monta a conversa da mensagem atual com system, contexto e histórico.
+
+    Retorna (conversa, caminho da conversa, número da mensagem atual, configuração do projeto).
+    """
+    if config is None:
+        config = load_project_config(root_dir)
+
+    # Inicializa ou carrega a conversa
+    system_message_path, conversa_path = initialize_conversation(root_dir)
+
+    # Carrega a mensagem de system
+    with open(system_message_path, 'r', encoding='utf-8') as sys_file:
+        system_message = json.load(sys_file)
+
+    # Obter o valor de controle_de_historico
+    controle_de_historico = config.controle_de_historico
+    current_turn = get_current_turn(conversa_path)
+
+    # Gera o contexto e a estrutura
+    differential = config.settings.get('modo_contexto', 'completo') == 'diferencial'
+    if differential:
+        # Envia apenas as alterações enquanto o contexto completo estiver no histórico
+        context_message = prepare_differential_context(
+            root_dir, conversa_path, current_turn, controle_de_historico, config.context, file_cache, dir_manifest)
+    else:
+        context_file_path = create_context_file(root_dir, config.context, file_cache, dir_manifest)
+        with open(context_file_path, 'r', encoding='utf-8') as context_file:
+            context_message = context_file.read()
+
+    # Carregar a conversa com base no controle_de_historico
+    conversation = load_conversation(conversa_path, controle_de_historico)
+
+    # Adiciona system message e contexto ao array de conversa
+    conversation.insert(0, {"role": "system", "content": system_message['content']})
+    if context_message and differential:
+        conversation.insert(len(conversation) - 1, {"role": "system", "content": context_message})
+    elif context_message:
+        conversation.insert(1, {"role": "system", "content": f"Contexto adicional: {context_message}"})
+
+    return conversation, conversa_path, current_turn, config
+
+
+def processar_envio(root_dir, config=None, file_cache=None, dir_manifest=None):
+    """Monta a conversa, envia ao modelo configurado e salva a resposta"""
+    conversation, conversa_path, current_turn, config = montar_conversa(
+        root_dir, config, file_cache, dir_manifest)
+    config_data = config.settings
+
+    # Passar o modelo carregado para a função de envio
+    model = config.modelo
+    modelos_alternativos = config_data.get('modelos_alternativos') or []
+    if modelos_alternativos:
+        # Dispara o próximo modelo se o principal demorar mais que o atraso configurado
+        delay = resolve_delay(root_dir, model, config_data.get('atraso_hedge', ATRASO_PADRAO))
+        winner, response, latencies = send_with_hedging(conversation, [model] + modelos_alternativos, delay)
+        # Inclui o modelo principal mesmo quando ele perde, para que o p95 do 'auto' não encolha a cada hedge
+        record_latencies(root_dir, latencies)
+        if winner != model:
+            log(f"[LOG] Resposta obtida do modelo alternativo {winner} ({latencies[winner]:.1f}s desde o seu disparo)")
+    else:
+        response = get_sender(model)(conversation)
+
+    # Salva a resposta
+    last_user_message_file = os.path.join(conversa_path, f"{current_turn}_mensagem.md")
+    save_response(conversa_path, response, last_user_message_file)
+
+    # Compacta as interações antigas, se configurado
+    if config_data.get('arquivamento_automatico'):
+        archive_from_config(conversa_path, config_data)
+
+    return response
+
+
+def archive_from_config(conversa_path, config_data):
+    """Executa o arquivamento da conversa usando as opções do config.yml"""
+    return archive_conversation(
+        conversa_path,
+        config_data.get('controle_de_historico', 0),
+        config_data.get('arquivar_apos_dias'),
+        config_data.get('compactacao', 'gzip'),
+    )
@@ -0,0 +1,162 @@
+import os
+import ast
+import json
+import hashlib
+
+CACHE_FILE = 'esbocos.json'
+
+# Extratores de esboço por extensão: função (conteúdo) -> esboço em texto, ou None se não for possível
+EXTRACTORS = {}
+
+def register_extractor(extension, extractor):
+    """Registra um extrator de esboço para arquivos com a extensão informada (ex: '.py')"""
+    EXTRACTORS[extension.lower()] = extractor
+
+
+def _signature(node, lines):
+    """Retorna as linhas de decoradores e da assinatura de uma classe ou função, como no código-fonte"""
+    start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+    first = node.body[0]
+    body_start = min([d.lineno for d in getattr(first, 'decorator_list', [])] + [first.lineno])
+    body_line = lines[body_start - 1]
+    # col_offset é contado em bytes UTF-8
+    body_col = first.col_offset if not getattr(first, 'decorator_list', None) else first.decorator_list[0].col_offset - 1
+    before_body = body_line.encode('utf-8')[:body_col].decode('utf-8')
+    if before_body.strip():
+        # O corpo começa na última linha da assinatura (ex: "def f(): pass" ou "    b): return a + b")
+        header = lines[start - 1:body_start]
+        header[-1] = before_body.rstrip()
+        return header
+    header = lines[start - 1:body_start - 1]
+    # Comentários e linhas em branco entre a assinatura e o corpo não fazem parte dela
+    while len(header) > 1 and (not header[-1].strip() or header[-1].lstrip().startswith('#')):
+        header.pop()
+    return header
+
+
+def _docstring(node, indent):
+    """Formata a docstring de um nó com a indentação do corpo"""
+    docstring = ast.get_docstring(node)
+    if not docstring:
+        return []
+    doc_lines = docstring.splitlines()
+    if len(doc_lines) == 1:
+        return [f'{indent}"""{doc_lines[0]}"""']
+    return [f'{indent}"""{doc_lines[0]}'] + [f"{indent}{line}" if line else '' for line in doc_lines[1:]] + [f'{indent}"""']
+
+
+def _outline_body(body, lines, output):
+    """Adiciona ao esboço as classes e funções de um bloco, descendo apenas em classes"""
+    for node in body:
+        if not isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        signature = _signature(node, lines)
+        output.extend(line.rstrip() for line in signature)
+        def_line = lines[node.lineno - 1]
+        indent = def_line[:len(def_line) - len(def_line.lstrip())] + ' ' * 4
+        output.extend(_docstring(node, indent))
+        if isinstance(node, ast.ClassDef):
+            before = len(output)
+            _outline_body(node.body, lines, output)
+            if len(output) == before:
+                output.append(f"{indent}...")
+        else:
+            output.append(f"{indent}...")
+
+
+def python_outline(source):
+    """Gera o esboço de um módulo Python: docstring do módulo, assinaturas e docstrings de classes e funções"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines = source.splitlines()
+    output = _docstring(tree, '')
+    if output:
+        output.append('')
+    _outline_body(tree.body, lines, output)
+    return "\n".join(output) + "\n"
+
+
+register_extractor('.py', python_outline)
+
+
+def get_cache_path(root_dir):
+    """Retorna o caminho do cache de esboços dentro do diretório .codeai"""
+    return os.path.join(root_dir, '.codeai', CACHE_FILE)
+
+
+class OutlineCache:
+    """Esboços indexados pela extensão e pelo hash do conteúdo, com registro das entradas usadas na execução"""
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+        self.used = set()
+        self.changed = False
+
+    def get(self, key):
+        """Retorna o esboço guardado para a chave, ou None"""
+        self.used.add(key)
+        return self.entries.get(key)
+
+    def put(self, key, outline):
+        """Guarda o esboço gerado para a chave"""
+        self.used.add(key)
+        self.entries[key] = outline
+        self.changed = True
+
+    def merge(self, other):
+        """Incorpora os esboços usados por uma cópia do cache em outro processo"""
+        for key in other.used:
+            if key in other.entries:
+                self.entries[key] = other.entries[key]
+        self.used |= other.used
+        self.changed = self.changed or other.changed
+
+
+def load_outline_cache(root_dir):
+    """Carrega o cache de esboços gravado em .codeai/"""
+    cache_path = get_cache_path(root_dir)
+    if not os.path.exists(cache_path):
+        return OutlineCache()
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return OutlineCache(json.load(f))
+    except (OSError, ValueError):
+        return OutlineCache()
+
+
+def save_outline_cache(root_dir, cache):
+    """Grava o cache de esboços apenas com as entradas usadas nesta execução, e só se algo mudou"""
+    stale = [key for key in cache.entries if key not in cache.used]
+    if not cache.changed and not stale:
+        return
+    for key in stale:
+        del cache.entries[key]
+    with open(get_cache_path(root_dir), 'w', encoding='utf-8') as f:
+        json.dump(cache.entries, f)
+    cache.changed = False
+
+
+def extract_outline(file_path, content, cache=None):
+    """Retorna o esboço do arquivo, ou None se não houver extrator para a extensão ou o esboço falhar.
+
+    Quando informado, o cache é consultado e atualizado usando o hash SHA-256 do conteúdo.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None:
+        return None
+
+    key = None
+    if cache is not None:
+        key = f"{extension}:{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    outline = extractor(content)
+    if key is not None and outline is not None:
+        cache.put(key, outline)
+    return outline
@@ -0,0 +1,129 @@
+import sys
+import json
+import threading
+from contextlib import contextmanager
+
+# Níveis de saída, do mais silencioso ao mais detalhado
+SILENCIOSO = 0
+RESUMO = 1
+VERBOSO = 2
+DEBUG = 3
+
+TAMANHO_PREVIA = 80
+
+_settings = {'nivel': RESUMO, 'json': False}
+_capture = threading.local()  # Saída capturada da thread atual (ver capture_output)
+
+def configure_output(nivel=RESUMO, json_events=False):
+    """Define o nível de saída e se os eventos JSON devem ser emitidos no stdout"""
+    _settings['nivel'] = nivel
+    _settings['json'] = json_events
+
+
+def _current():
+    """Retorna as opções de saída da thread atual: as da captura em andamento ou as globais"""
+    return getattr(_capture, 'settings', None) or _settings
+
+
+def get_level():
+    """Retorna o nível de saída atual"""
+    return _current()['nivel']
+
+
+def json_events_enabled():
+    """Indica se os eventos JSON estão ativos"""
+    return _current()['json']
+
+
+@contextmanager
+def capture_output(nivel=RESUMO, json_events=False):
+    """Acumula em uma lista o texto e os eventos da thread atual, com o nível e o modo JSON informados.
+
+    Usado pelo daemon para devolver ao cliente a saída de um comando; veja replay_output.
+    """
+    saida = []
+    _capture.settings = {'nivel': nivel, 'json': json_events, 'saida': saida}
+    try:
+        yield saida
+    finally:
+        _capture.settings = None
+
+
+def replay_output(saida):
+    """Reproduz no processo atual o texto e os eventos capturados por capture_output"""
+    for tipo, conteudo in saida:
+        if tipo == 'evento':
+            emit_event(**conteudo)
+        else:
+            log(conteudo, SILENCIOSO)  # O nível já foi aplicado na captura
+
+
+def log(message, nivel=RESUMO):
+    """Mostra uma mensagem se o nível atual permitir. Com eventos JSON, o texto vai para o stderr."""
+    settings = _current()
+    if settings['nivel'] < nivel:
+        return
+    if 'saida' in settings:
+        settings['saida'].append(['texto', str(message)])
+    else:
+        print(message, file=sys.stderr if settings['json'] else sys.stdout)
+
+
+def emit_event(evento, **dados):
+    """Emite um evento JSON por linha no stdout, para consumo por outras ferramentas"""
+    settings = _current()
+    if not settings['json']:
+        return
+    if 'saida' in settings:
+        settings['saida'].append(['evento', dict(evento=evento, **dados)])
+    else:
+        print(json.dumps(dict(evento=evento, **dados), ensure_ascii=False), flush=True)
+
+
+def preview(text, limit=TAMANHO_PREVIA):
+    """Retorna uma prévia de uma linha do texto, truncada em limit caracteres"""
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _size(text):
+    """Tamanho do texto em bytes UTF-8"""
+    return len(text.encode('utf-8'))
+
+
+def log_request(provider, conversation, prompt=None):
+    """Registra o envio: resumo com contagens, tamanhos e prévias; conteúdo completo apenas no nível debug"""
+    total = sum(_size(msg['content']) for msg in conversation)
+    emit_event('envio', provedor=provider, mensagens=len(conversation), bytes=total)
+
+    if get_level() >= DEBUG:
+        log(f"Mensagem enviada para {provider}:", DEBUG)
+        if prompt is not None:
+            log(prompt, DEBUG)
+        else:
+            for msg in conversation:
+                log(f"{msg['role'].capitalize()}: {msg['content']}", DEBUG)
+        log("=" * 50, DEBUG)
+        return
+
+    log(f"Enviando {len(conversation)} mensagens para {provider} ({total} bytes)")
+    for msg in conversation:
+        log(f"  {msg['role']:<9} {_size(msg['content']):>9} bytes  {preview(msg['content'])}", VERBOSO)
+
+
+def log_response(provider, text):
+    """Registra a resposta: prévia no resumo e texto completo no nível verboso"""
+    emit_event('resposta', provedor=provider, bytes=_size(text), previa=preview(text))
+    if get_level() >= VERBOSO:
+        log(f"Resposta recebida de {provider}:", VERBOSO)
+        log(text, VERBOSO)
+        log("=" * 50, VERBOSO)
+    else:
+        log(f"Resposta recebida de {provider} ({_size(text)} bytes): {preview(text)}")
+
+
+def log_usage(provider, prompt_tokens, completion_tokens, total_tokens):
+    """Registra a contagem de tokens informada pelo provedor"""
+    emit_event('uso', provedor=provider, tokens_prompt=prompt_tokens,
+               tokens_resposta=completion_tokens, tokens_total=total_tokens)
+    log(f"Tokens: prompt {prompt_tokens}, resposta {completion_tokens}, total {total_tokens}")
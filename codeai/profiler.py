@@ -0,0 +1,52 @@
+import os
+import time
+import cProfile
+import pstats
+import tracemalloc
+
+PERFIL_DIR = 'perfil'
+MODULOS_RESUMO = ('context_manager', 'conversation_manager')
+TOP_FUNCOES = 10
+TOP_ALOCACOES = 25
+
+def start_profiling():
+    """Inicia o cProfile e o tracemalloc e retorna o profiler ativo"""
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def summarize_stats(stats, modules=MODULOS_RESUMO, limit=TOP_FUNCOES):
+    """Retorna as funções mais custosas (tempo acumulado) dos módulos informados"""
+    rows = []
+    for (filename, lineno, funcname), (cc, nc, tt, ct, callers) in stats.stats.items():
+        module = os.path.splitext(os.path.basename(filename))[0]
+        if module in modules:
+            rows.append((ct, tt, nc, f"{module}.{funcname}:{lineno}"))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+def finish_profiling(profiler, root_dir, command_name):
+    """Encerra a coleta, grava .pstats e o relatório de alocações em .codeai/perfil/ e retorna o resumo"""
+    profiler.disable()
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    perfil_dir = os.path.join(root_dir, '.codeai', PERFIL_DIR)
+    os.makedirs(perfil_dir, exist_ok=True)
+    base_name = f"{time.strftime('%Y%m%d-%H%M%S')}_{command_name or 'main'}"
+
+    pstats_path = os.path.join(perfil_dir, f"{base_name}.pstats")
+    profiler.dump_stats(pstats_path)
+
+    alocacoes_path = os.path.join(perfil_dir, f"{base_name}_alocacoes.txt")
+    with open(alocacoes_path, 'w', encoding='utf-8') as f:
+        f.write(f"Memória atual: {current / 1024:.1f} KiB, pico: {peak / 1024:.1f} KiB\n\n")
+        for stat in snapshot.statistics('lineno')[:TOP_ALOCACOES]:
+            f.write(f"{stat}\n")
+
+    summary = summarize_stats(pstats.Stats(profiler))
+    return pstats_path, alocacoes_path, summary
@@ -0,0 +1,21 @@
+import os
+import pytest
+from codeai.context_manager import initialize_context
+
+@pytest.fixture
+def make_codeai_project(tmp_path):
+    """Retorna uma função que cria um projeto com a pasta .codeai, o .codeai_context padrão e os arquivos informados."""
+    def make(name="projeto", files=None):
+        root_dir = str(tmp_path / name)
+        os.makedirs(os.path.join(root_dir, '.codeai'))
+        initialize_context(root_dir)
+        for path, content in (files or {}).items():
+            with open(os.path.join(root_dir, path), 'w', encoding='utf-8') as f:
+                f.write(content)
+        return root_dir
+    return make
+
+@pytest.fixture
+def codeai_project(make_codeai_project):
+    """Cria um projeto com a pasta .codeai e o .codeai_context padrão e retorna a sua pasta raiz."""
+    return make_codeai_project()
@@ -0,0 +1,130 @@
+import os
+import json
+import yaml
+import pytest
+from types import SimpleNamespace
+from codeai.conversation_manager import initialize_conversation
+from codeai.batch import (
+    load_prompts,
+    build_batch_requests,
+    submit_batch,
+    wait_for_batch,
+    distribute_results,
+)
+
+class FakeBatchClient:
+    """Substituto local dos endpoints de arquivos e lotes da Batch API da OpenAI."""
+
+    def __init__(self, polls_until_done=2, fail_ids=()):
+        self.stored_files = {}
+        self.jobs = {}
+        self.polls_until_done = polls_until_done
+        self.fail_ids = set(fail_ids)
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _store(self, text):
+        file_id = f"file-{len(self.stored_files) + 1}"
+        self.stored_files[file_id] = text
+        return file_id
+
+    def _create_file(self, file, purpose):
+        assert purpose == 'batch'
+        return SimpleNamespace(id=self._store(file[1].decode('utf-8')))
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self.stored_files[file_id])
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        batch_id = f"batch-{len(self.jobs) + 1}"
+        self.jobs[batch_id] = {'input': input_file_id, 'polls': 0, 'output': None}
+        return SimpleNamespace(id=batch_id, status='validating')
+
+    def _retrieve_batch(self, batch_id):
+        job = self.jobs[batch_id]
+        job['polls'] += 1
+        if job['polls'] <= self.polls_until_done:
+            return SimpleNamespace(id=batch_id, status='in_progress', output_file_id=None, error_file_id=None)
+        if job['output'] is None:
+            job['output'] = self._store(self._answer(self.stored_files[job['input']]))
+        return SimpleNamespace(id=batch_id, status='completed', output_file_id=job['output'], error_file_id=None)
+
+    def _answer(self, input_jsonl):
+        """Responde cada requisição ecoando a última mensagem do usuário."""
+        lines = []
+        for line in input_jsonl.splitlines():
+            request = json.loads(line)
+            if request['custom_id'] in self.fail_ids:
+                lines.append({'custom_id': request['custom_id'], 'response': None,
+                              'error': {'message': 'falha simulada'}})
+                continue
+            question = request['body']['messages'][-1]['content']
+            body = {'choices': [{'message': {'role': 'assistant', 'content': f"Resposta para: {question}"}}]}
+            lines.append({'custom_id': request['custom_id'], 'response': {'status_code': 200, 'body': body}})
+        return "\n".join(json.dumps(line) for line in lines)
+
+@pytest.fixture
+def setup_project(codeai_project):
+    """Cria um projeto com configuração, conversa e um arquivo de contexto."""
+    root_dir = codeai_project
+    with open(os.path.join(root_dir, '.codeai', 'config.yml'), 'w', encoding='utf-8') as f:
+        yaml.dump({'modelo': 'gpt-4o-mini', 'controle_de_historico': 0}, f)
+    _, conversa_path = initialize_conversation(root_dir)
+    with open(os.path.join(root_dir, 'app.py'), 'w', encoding='utf-8') as f:
+        f.write("print('app')\n")
+    return root_dir, conversa_path
+
+def test_load_prompts_from_directory_and_jsonl(tmp_path):
+    prompts_dir = tmp_path / "prompts"
+    prompts_dir.mkdir()
+    (prompts_dir / "b.md").write_text("Segunda", encoding='utf-8')
+    (prompts_dir / "a.md").write_text("Primeira", encoding='utf-8')
+    (prompts_dir / "ignorar.json").write_text("{}", encoding='utf-8')
+    assert [p['mensagem'] for p in load_prompts(str(prompts_dir))] == ["Primeira", "Segunda"]
+
+    jsonl = tmp_path / "prompts.jsonl"
+    jsonl.write_text('{"mensagem": "Um"}\n\n{"id": "x", "mensagem": "Dois", "raiz": "/outro"}\n', encoding='utf-8')
+    prompts = load_prompts(str(jsonl))
+    assert [p['id'] for p in prompts] == ["1", "x"]
+    assert prompts[1]['raiz'] == "/outro"
+
+def test_batch_round_trip(setup_project):
+    root_dir, conversa_path = setup_project
+    client = FakeBatchClient(fail_ids={'2-c'})
+    prompts = [
+        {'id': 'a', 'mensagem': 'Pergunta A'},
+        {'id': 'b', 'mensagem': 'Pergunta B'},
+        {'id': 'c', 'mensagem': 'Pergunta C'},
+    ]
+
+    requests, targets = build_batch_requests(prompts, root_dir)
+    assert len(requests) == 3
+    assert requests[0]['url'] == '/v1/chat/completions'
+    assert "print('app')" in requests[0]['body']['messages'][1]['content']
+    assert requests[1]['body']['messages'][-1] == {'role': 'user', 'content': 'Pergunta B'}
+
+    batch_id = submit_batch(client, requests)
+    results = wait_for_batch(client, batch_id, intervalo=0, sleep=lambda _: None)
+    assert results['0-a'] == {'resposta': 'Resposta para: Pergunta A'}
+    assert 'erro' in results['2-c']
+
+    assert distribute_results(targets, results) == 2
+    with open(os.path.join(conversa_path, '1_mensagem.md'), encoding='utf-8') as f:
+        assert f.read() == 'Pergunta A'
+    with open(os.path.join(conversa_path, '2_resposta.md'), encoding='utf-8') as f:
+        assert f.read() == 'Resposta para: Pergunta B'
+    assert os.path.exists(os.path.join(conversa_path, '3_mensagem.md'))
+    assert not os.path.exists(os.path.join(conversa_path, '3_resposta.md'))
+
+def test_distribute_results_keeps_unsent_draft(setup_project):
+    root_dir, conversa_path = setup_project
+    with open(os.path.join(conversa_path, '1_mensagem.md'), 'w', encoding='utf-8') as f:
+        f.write("Rascunho ainda não enviado")
+    targets = [{'custom_id': '0-a', 'raiz': root_dir, 'mensagem': 'Pergunta A'}]
+
+    assert distribute_results(targets, {'0-a': {'resposta': 'Resposta A'}}) == 1
+
+    with open(os.path.join(conversa_path, '1_mensagem.md'), encoding='utf-8') as f:
+        assert f.read() == 'Pergunta A'
+    with open(os.path.join(conversa_path, '2_mensagem.md'), encoding='utf-8') as f:
+        assert f.read() == "Rascunho ainda não enviado"
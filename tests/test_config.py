@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import yaml
+import pytest
+from codeai import config as config_module
+from codeai.config import load_project_config
+from codeai.context_manager import IgnoreRules, should_ignore
+
+@pytest.fixture
+def setup_project(codeai_project):
+    """Cria um projeto com .codeai_context e config.yml."""
+    root_dir = codeai_project
+    with open(os.path.join(root_dir, '.codeai', 'config.yml'), 'w', encoding='utf-8') as f:
+        yaml.dump({'modelo': 'gpt-4o-mini', 'controle_de_historico': 3}, f)
+    return root_dir
+
+def _count_builds(monkeypatch):
+    builds = []
+    original = config_module.build_project_config
+    monkeypatch.setattr(config_module, 'build_project_config', lambda root_dir: builds.append(root_dir) or original(root_dir))
+    return builds
+
+def test_project_config_values(setup_project):
+    root_dir = setup_project
+    config = load_project_config(root_dir)
+
+    assert config.modelo == 'gpt-4o-mini'
+    assert config.controle_de_historico == 3
+    assert os.path.isabs(config.pasta_raiz)
+    assert config.context['regras']
+    assert os.path.exists(os.path.join(root_dir, '.codeai', 'config_cache.json'))
+
+def test_warm_load_uses_cache_until_sources_change(setup_project, monkeypatch):
+    root_dir = setup_project
+    builds = _count_builds(monkeypatch)
+
+    load_project_config(root_dir)
+    load_project_config(root_dir)
+    assert len(builds) == 1
+
+    config_yml = os.path.join(root_dir, '.codeai', 'config.yml')
+    with open(config_yml, 'w', encoding='utf-8') as f:
+        yaml.dump({'modelo': 'gemini-1.5-flash'}, f)
+    future = time.time() + 10
+    os.utime(config_yml, (future, future))
+
+    assert load_project_config(root_dir).modelo == 'gemini-1.5-flash'
+    assert len(builds) == 2
+
+def test_ignore_rules_match_should_ignore():
+    patterns = [".git/", "*.pyc", "build/*", "node_modules/", ".env", "  "]
+    root_dir = "/fake/root"
+    rules = IgnoreRules(patterns, root_dir)
+    paths = [
+        "/fake/root/.git",
+        "/fake/root/.git/config",
+        "/fake/root/.gitignore",
+        "/fake/root/src/app.pyc",
+        "/fake/root/src/app.py",
+        "/fake/root/build",
+        "/fake/root/build/out.js",
+        "/fake/root/node_modules/",
+        "/fake/root/sub/.env",
+        "/fake/root/sub/x.env",
+    ]
+    for path in paths:
+        assert rules.matches(path) == should_ignore(path, patterns, root_dir), path
+
+def test_cache_is_plain_json_and_corrupt_cache_is_ignored(setup_project):
+    root_dir = setup_project
+    load_project_config(root_dir)
+    cache_path = os.path.join(root_dir, '.codeai', 'config_cache.json')
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        cached = json.load(f)
+    assert 'regras' not in cached['contexto']
+
+    # Um cache inválido (ex.: versionado junto com o repositório) é descartado e refeito
+    with open(cache_path, 'wb') as f:
+        f.write(b"\x80\x04cos\nsystem\n")
+    config = load_project_config(root_dir)
+    assert config.modelo == 'gpt-4o-mini'
+    assert config.context['regras']
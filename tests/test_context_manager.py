@@ -9,7 +9,10 @@ from codeai.context_manager import (
     should_ignore,
     generate_structure,
     create_context_file,
+    create_context_files,
 )
+import json
+from codeai.outline import python_outline
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -313,3 +316,218 @@ def test_validation_file_and_structure(setup_complex_environment):
     assert any("dir1/" in line for line in structure), "Estrutura não contém 'dir1/'"
     assert any("dir2/" in line for line in structure), "Estrutura não contém 'dir2/'"
     assert any("file4.md" in line for line in structure), "Estrutura não contém 'file4.md'"
+
+def test_generate_structure_collapses_large_and_deep_directories(setup_criar_environment):
+    root_dir = setup_criar_environment
+    initialize_context(root_dir)
+    os.makedirs(os.path.join(root_dir, 'src/gen'))
+    os.makedirs(os.path.join(root_dir, 'a/b/c'))
+    Path(os.path.join(root_dir, 'src/main.py')).touch()
+    for i in range(5):
+        Path(os.path.join(root_dir, f'src/gen/mod{i}.py')).touch()
+    Path(os.path.join(root_dir, 'src/gen/dados.json')).touch()
+    Path(os.path.join(root_dir, 'a/b/c/fundo.txt')).touch()
+
+    context_data = load_context(root_dir)
+    context_data['estrutura_max_entradas'] = 3
+    context_data['estrutura_profundidade'] = 1
+    structure = generate_structure(root_dir, context_data)
+
+    logger.info(f"Estrutura recolhida:\n{structure}")
+
+    assert "    src/" in structure
+    assert "        main.py" in structure
+    assert "        gen/ — 6 arquivos: 5 .py, 1 .json" in structure
+    assert "        b/ — 1 arquivos: 1 .txt" in structure
+    assert not any("mod0.py" in line for line in structure)
+
+def test_generate_structure_compact_format(setup_criar_environment):
+    root_dir = setup_criar_environment
+    config_path = os.path.join(root_dir, '.codeai', '.codeai_context')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write("[context]\n")
+        f.write(f"pasta-raiz: {root_dir}\n\n")
+        f.write("[estrutura]\n")
+        f.write("formato: compacto\n")
+        f.write("adicionar:\n.\n\n")
+        f.write("ignorar:\n.codeai/\n")
+    os.makedirs(os.path.join(root_dir, 'dir1/subdir'))
+    Path(os.path.join(root_dir, 'dir1/subdir/file1.txt')).touch()
+    Path(os.path.join(root_dir, 'dir1/subdir/file2.txt')).touch()
+    Path(os.path.join(root_dir, 'top.md')).touch()
+
+    structure = generate_structure(root_dir)
+
+    assert structure[0] == "./: top.md"
+    assert sorted(structure[1].split(": ")[1].split(", ")) == ["file1.txt", "file2.txt"]
+    assert structure[1].startswith("dir1/subdir/: ")
+    assert len(structure) == 2
+
+def test_python_outline():
+    source = (
+        '"""Módulo de exemplo."""\n'
+        'import os\n\n'
+        'class Foo(object):\n'
+        '    """Classe Foo."""\n\n'
+        '    @property\n'
+        '    def bar(self, x: int = 1) -> str:\n'
+        '        """Retorna bar."""\n'
+        '        return str(x)\n\n'
+        'def soma(a, b): return a + b\n'
+    )
+    outline = python_outline(source)
+
+    logger.info(f"Esboço gerado:\n{outline}")
+
+    assert '"""Módulo de exemplo."""' in outline
+    assert "class Foo(object):" in outline
+    assert "    @property" in outline
+    assert "    def bar(self, x: int = 1) -> str:" in outline
+    assert '        """Retorna bar."""' in outline
+    assert "def soma(a, b):" in outline
+    assert "return" not in outline
+    assert "import os" not in outline
+
+def test_create_context_file_outline_mode(setup_criar_environment):
+    root_dir = setup_criar_environment
+    initialize_context(root_dir)
+    with open(os.path.join(root_dir, 'modulo.py'), 'w', encoding='utf-8') as f:
+        f.write('def calcula(x):\n    """Calcula algo."""\n    return x * 42\n')
+    with open(os.path.join(root_dir, 'notas.md'), 'w', encoding='utf-8') as f:
+        f.write("Notas completas")
+
+    context_data = load_context(root_dir)
+    context_data['esboco'] = ['*.py']
+    context_file_path = create_context_file(root_dir, context_data)
+
+    with open(context_file_path, 'r', encoding='utf-8') as context_file:
+        content = context_file.read()
+
+    assert "--- Esboço de" in content
+    assert "def calcula(x):" in content
+    assert "x * 42" not in content
+    assert "Notas completas" in content
+    assert os.path.exists(os.path.join(root_dir, '.codeai', 'esbocos.json'))
+
+def test_create_context_file_multiple_roots(make_codeai_project):
+    service_a = make_codeai_project('servico_a', {'app.py': 'print("a")', 'LEIAME.md': 'Leia A'})
+    service_b = make_codeai_project('servico_b', {'main.go': 'package main', 'LEIAME.md': 'Leia B'})
+
+    with open(os.path.join(service_a, '.codeai', '.codeai_context'), 'r', encoding='utf-8') as f:
+        config = f.read()
+    config = config.replace(f"pasta-raiz: {service_a}\n", f"pasta-raiz: {service_a}\npasta-raiz: {service_b}\n")
+    config = config.replace("adicionar:\n.\n", "adicionar:\n.\nLEIAME.md\n", 1)
+    with open(os.path.join(service_a, '.codeai', '.codeai_context'), 'w', encoding='utf-8') as f:
+        f.write(config)
+
+    context_data = load_context(service_a)
+    assert context_data['pastas_raiz'] == [service_a, service_b]
+    assert context_data['pasta_raiz'] == service_a
+
+    context_file_path = create_context_file(service_a, context_data)
+    with open(context_file_path, 'r', encoding='utf-8') as context_file:
+        content = context_file.read()
+
+    # Os arquivos de cada pasta aparecem uma única vez, na ordem das pastas raiz
+    assert content.index('print("a")') < content.index('package main')
+    assert content.count("Leia A") == 1 and content.count("Leia B") == 1
+    assert f"[{service_a}]" in content and f"[{service_b}]" in content
+    assert "servico_b/" in content
+
+    # A geração é determinística
+    with open(create_context_file(service_a, context_data), 'r', encoding='utf-8') as context_file:
+        assert context_file.read() == content
+
+def test_create_context_files_for_independent_projects(make_codeai_project, tmp_path):
+    roots = [make_codeai_project(f'servico_{i}', {'app.py': f'SERVICO = {i}'}) for i in range(3)]
+    missing = str(tmp_path / 'sem_config')
+    os.makedirs(missing)
+
+    results = create_context_files(roots + [missing], processos=2)
+
+    assert [root for root, _, _ in results] == roots + [missing]
+    for i, (root, context_file_path, erro) in enumerate(results[:3]):
+        assert erro is None
+        with open(context_file_path, 'r', encoding='utf-8') as context_file:
+            assert f'SERVICO = {i}' in context_file.read()
+    assert results[3][1] is None and "Configuração não encontrada" in results[3][2]
+
+def test_create_context_files_isolates_malformed_project(make_codeai_project):
+    valid = make_codeai_project('valido', {'app.py': 'VALIDO = 1'})
+    malformed = make_codeai_project('invalido', {'x.sql': 'SELECT 1;'})
+    config_path = os.path.join(malformed, '.codeai', '.codeai_context')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = f.read()
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write(config.replace("adicionar:\n.\n", "adicionar:\n.\nx.sql:9-1\n", 1))
+
+    results = create_context_files([valid, malformed], processos=2)
+
+    # O projeto com intervalo inválido vira um erro e não impede o resultado do projeto válido
+    assert results[0][0] == valid and results[0][2] is None
+    with open(results[0][1], 'r', encoding='utf-8') as context_file:
+        assert 'VALIDO = 1' in context_file.read()
+    assert results[1][0] == malformed and results[1][1] is None
+    assert "Intervalo de linhas inválido" in results[1][2]
+
+def test_create_context_file_with_slices_and_size_limit(setup_criar_environment):
+    root_dir = setup_criar_environment
+    initialize_context(root_dir)
+    os.makedirs(os.path.join(root_dir, 'logs'))
+    with open(os.path.join(root_dir, 'logs', 'app.log'), 'w', encoding='utf-8') as f:
+        f.writelines(f"evento {i}\n" for i in range(1, 101))
+    with open(os.path.join(root_dir, 'schema.sql'), 'w', encoding='utf-8') as f:
+        f.writelines(f"CREATE TABLE t{i} (id int);\n" for i in range(1, 51))
+    with open(os.path.join(root_dir, 'dados.csv'), 'w', encoding='utf-8') as f:
+        f.writelines(f"{i},valor\n" for i in range(1, 5001))
+
+    config_path = os.path.join(root_dir, '.codeai', '.codeai_context')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = f.read()
+    config = config.replace("adicionar:\n.\n", "adicionar:\n.\nlogs/app.log:-2\nschema.sql:2-3\nlimite-tamanho: 1k\n", 1)
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write(config)
+
+    context_data = load_context(root_dir)
+    assert context_data['adicionar'][1:] == ['logs/app.log', 'schema.sql']
+    assert context_data['limite_tamanho'] == 1024
+
+    with open(create_context_file(root_dir, context_data), 'r', encoding='utf-8') as context_file:
+        content = context_file.read()
+
+    # O log é ignorado por '*.log', mas o recorte pedido explicitamente é incluído
+    assert "--- Trecho de logs/app.log (últimas 2 linhas) ---\nevento 99\nevento 100\n" in content
+    assert "evento 98" not in content
+    assert "(linhas 2-3) ---\nCREATE TABLE t2 (id int);\nCREATE TABLE t3 (id int);\n" in content
+    assert content.count("CREATE TABLE") == 2
+    assert "dados.csv (início e fim de" in content
+    assert "1,valor" in content and "5000,valor" in content and "2500,valor" not in content
+
+def test_python_outline_signatures_sharing_a_line_with_the_body():
+    source = 'def f(a,\n      b): return a+b\n\ndef g(s="çã"): pass\n'
+    outline = python_outline(source)
+
+    assert "def f(a,\n      b):\n" in outline
+    assert 'def g(s="çã"):\n' in outline
+    assert "return" not in outline and "pass" not in outline
+
+def test_outline_cache_keeps_only_used_entries(setup_criar_environment):
+    root_dir = setup_criar_environment
+    initialize_context(root_dir)
+    module_path = os.path.join(root_dir, 'modulo.py')
+    cache_path = os.path.join(root_dir, '.codeai', 'esbocos.json')
+    context_data = load_context(root_dir)
+    context_data['modo'] = 'esboco'
+
+    for version in range(3):
+        with open(module_path, 'w', encoding='utf-8') as f:
+            f.write(f"def versao_{version}():\n    return {version}\n")
+        create_context_file(root_dir, context_data)
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        assert len(json.load(f)) == 1
+
+    # Sem alterações, o cache não é regravado
+    mtime = os.stat(cache_path).st_mtime_ns
+    os.utime(cache_path, ns=(mtime - 10**9, mtime - 10**9))
+    create_context_file(root_dir, context_data)
+    assert os.stat(cache_path).st_mtime_ns == mtime - 10**9
@@ -0,0 +1,55 @@
+import os
+import pytest
+from codeai.context_snapshot import prepare_differential_context, load_manifest
+from codeai.conversation_manager import initialize_conversation, load_conversation
+
+@pytest.fixture
+def setup_project(codeai_project):
+    """Cria um projeto com configuração, conversa e dois arquivos de código."""
+    root_dir = codeai_project
+    _, conversa_path = initialize_conversation(root_dir)
+    with open(os.path.join(root_dir, 'a.py'), 'w', encoding='utf-8') as f:
+        f.write("".join(f"linha_{i} = {i}\n" for i in range(50)))
+    with open(os.path.join(root_dir, 'b.py'), 'w', encoding='utf-8') as f:
+        f.write("VALOR = 1\n")
+    return root_dir, conversa_path
+
+def test_first_turn_records_full_context(setup_project):
+    root_dir, conversa_path = setup_project
+
+    assert prepare_differential_context(root_dir, conversa_path, 1, 2) is None
+    assert os.path.exists(os.path.join(conversa_path, '1_contexto.md'))
+    assert load_manifest(root_dir)['turno'] == 1
+
+    conversation = load_conversation(conversa_path, 2)
+    assert conversation[0]['role'] == 'system'
+    assert "VALOR = 1" in conversation[0]['content']
+    assert conversation[1]['role'] == 'user'
+
+def test_later_turn_sends_only_changes(setup_project):
+    root_dir, conversa_path = setup_project
+    prepare_differential_context(root_dir, conversa_path, 1, 2)
+
+    with open(os.path.join(root_dir, 'a.py'), 'a', encoding='utf-8') as f:
+        f.write("nova_linha = 'alterada'\n")
+    with open(os.path.join(root_dir, 'c.py'), 'w', encoding='utf-8') as f:
+        f.write("NOVO = True\n")
+
+    delta = prepare_differential_context(root_dir, conversa_path, 2, 2)
+
+    assert "interação 1" in delta
+    assert "--- Diff de" in delta
+    assert "+nova_linha = 'alterada'" in delta
+    assert "linha_10 = 10" not in delta
+    assert "NOVO = True" in delta
+    assert "Arquivos sem alterações:" in delta and "b.py" in delta
+    assert not os.path.exists(os.path.join(conversa_path, '2_contexto.md'))
+
+def test_full_context_resent_after_history_trim(setup_project):
+    root_dir, conversa_path = setup_project
+    prepare_differential_context(root_dir, conversa_path, 1, 1)
+
+    assert prepare_differential_context(root_dir, conversa_path, 2, 1) is not None
+    assert prepare_differential_context(root_dir, conversa_path, 3, 1) is None
+    assert os.path.exists(os.path.join(conversa_path, '3_contexto.md'))
+    assert load_manifest(root_dir)['turno'] == 3
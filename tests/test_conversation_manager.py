@@ -1,10 +1,12 @@
 import os
+import time
 import pytest
 import yaml
 from codeai.conversation_manager import (
     initialize_conversation,
     load_conversation,
     save_response,
+    archive_conversation,
 )
 
 @pytest.fixture
@@ -71,3 +73,67 @@ def test_save_response(setup_test_project):
         content = f.read()
     
     assert content == "Resposta do assistente 1"
+
+def _write_turns(conversa_path, count):
+    """Cria interações completas de 1 até count e a mensagem atual count + 1."""
+    for number in range(1, count + 1):
+        with open(os.path.join(conversa_path, f"{number}_mensagem.md"), 'w', encoding='utf-8') as f:
+            f.write(f"Mensagem {number}")
+        with open(os.path.join(conversa_path, f"{number}_resposta.md"), 'w', encoding='utf-8') as f:
+            f.write(f"Resposta {number}")
+    with open(os.path.join(conversa_path, f"{count + 1}_mensagem.md"), 'w', encoding='utf-8') as f:
+        f.write(f"Mensagem {count + 1}")
+
+def test_archive_conversation_outside_history(setup_test_project):
+    project_dir, system_path, conversa_path = setup_test_project
+    _write_turns(conversa_path, 5)
+    full_history = load_conversation(conversa_path, controle_de_historico=10)
+
+    archived = archive_conversation(conversa_path, controle_de_historico=2)
+
+    assert archived == [1, 2, 3]
+    assert not os.path.exists(os.path.join(conversa_path, "1_mensagem.md"))
+    assert os.path.exists(os.path.join(conversa_path, "4_mensagem.md"))
+    assert any(f.endswith('.jsonl.gz') for f in os.listdir(os.path.join(conversa_path, 'arquivo')))
+
+    # O histórico é o mesmo, lendo dos segmentos quando necessário
+    assert load_conversation(conversa_path, controle_de_historico=10) == full_history
+    recent = load_conversation(conversa_path, controle_de_historico=1)
+    assert [m['content'] for m in recent] == ["Mensagem 5", "Resposta 5", "Mensagem 6"]
+
+    # A inicialização não recria a primeira mensagem já arquivada
+    initialize_conversation(project_dir)
+    assert not os.path.exists(os.path.join(conversa_path, "1_mensagem.md"))
+
+def test_archive_conversation_by_age(setup_test_project):
+    project_dir, system_path, conversa_path = setup_test_project
+    _write_turns(conversa_path, 3)
+    old = time.time() - 10 * 86400
+    for name in ("1_mensagem.md", "1_resposta.md"):
+        os.utime(os.path.join(conversa_path, name), (old, old))
+
+    archived = archive_conversation(conversa_path, max_age_days=7)
+
+    assert archived == [1]
+    assert load_conversation(conversa_path, controle_de_historico=10)[0]['content'] == "Mensagem 1"
+
+def test_archive_conversation_zstd_round_trip(setup_test_project):
+    zstandard = pytest.importorskip('zstandard')
+    project_dir, system_path, conversa_path = setup_test_project
+    _write_turns(conversa_path, 4)
+    full_history = load_conversation(conversa_path, controle_de_historico=10)
+
+    archived = archive_conversation(conversa_path, controle_de_historico=1, compression='zstd')
+
+    assert archived == [1, 2, 3]
+    archive_path = os.path.join(conversa_path, 'arquivo')
+    segments = [f for f in os.listdir(archive_path) if f.endswith('.jsonl.zst')]
+    assert segments == ["segmento_1-3.jsonl.zst"]
+    assert not any(f.endswith('.tmp.jsonl.zst') for f in os.listdir(archive_path))
+
+    # O quadro zstd foi finalizado ao fechar o segmento: ele descompacta sozinho, sem depender do leitor em fluxo
+    with open(os.path.join(archive_path, segments[0]), 'rb') as f:
+        content = zstandard.ZstdDecompressor().decompress(f.read(), max_output_size=1024 * 1024).decode('utf-8')
+    assert content.count("\n") == 6
+
+    assert load_conversation(conversa_path, controle_de_historico=10) == full_history
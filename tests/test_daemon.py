@@ -0,0 +1,111 @@
+import os
+import socket
+import threading
+import time
+import pytest
+from codeai import daemon
+from codeai.output import DEBUG, capture_output, emit_event, log
+from codeai.daemon import ProjectState, get_socket_path, run_daemon, send_command
+
+@pytest.fixture
+def setup_daemon_project(codeai_project):
+    """Cria um projeto com configuração e um daemon ativo em segundo plano."""
+    root_dir = codeai_project
+    with open(os.path.join(root_dir, 'app.py'), 'w', encoding='utf-8') as f:
+        f.write("print('versão 1')\n")
+
+    thread = threading.Thread(target=run_daemon, args=(root_dir, 0.05), daemon=True)
+    thread.start()
+    for _ in range(100):
+        if send_command(root_dir, 'ping') == 'pong':
+            break
+        time.sleep(0.05)
+
+    yield root_dir
+
+    send_command(root_dir, 'parar')
+    thread.join(timeout=5)
+
+def test_send_command_without_daemon(tmp_path):
+    os.makedirs(os.path.join(str(tmp_path), '.codeai'))
+    assert send_command(str(tmp_path), 'contexto') is None
+
+def test_send_command_does_not_fall_back_after_request_is_sent(codeai_project):
+    root_dir = codeai_project
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(get_socket_path(root_dir))
+    server.listen(1)
+
+    def accept_and_die():
+        # Simula um daemon que recebe o pedido e encerra antes de responder
+        conn, _ = server.accept()
+        conn.recv(4096)
+        conn.close()
+
+    thread = threading.Thread(target=accept_and_die, daemon=True)
+    thread.start()
+    try:
+        with pytest.raises(RuntimeError, match="encerrou a conexão"):
+            send_command(root_dir, 'enviar')
+    finally:
+        thread.join(timeout=5)
+        server.close()
+
+def test_daemon_generates_context(setup_daemon_project):
+    root_dir = setup_daemon_project
+
+    context_file_path = send_command(root_dir, 'contexto')
+    with open(context_file_path, 'r', encoding='utf-8') as f:
+        assert "versão 1" in f.read()
+
+    # Alterações em disco devem aparecer mesmo com o índice em memória
+    with open(os.path.join(root_dir, 'app.py'), 'w', encoding='utf-8') as f:
+        f.write("print('versão 2 alterada')\n")
+    context_file_path = send_command(root_dir, 'contexto')
+    with open(context_file_path, 'r', encoding='utf-8') as f:
+        assert "versão 2 alterada" in f.read()
+
+def test_daemon_stop_removes_socket(setup_daemon_project):
+    root_dir = setup_daemon_project
+    assert send_command(root_dir, 'parar') == 'parando'
+    for _ in range(100):
+        if not os.path.exists(get_socket_path(root_dir)):
+            break
+        time.sleep(0.05)
+    assert not os.path.exists(get_socket_path(root_dir))
+    assert send_command(root_dir, 'ping') is None
+
+def test_daemon_reloads_edited_config_before_handling(codeai_project):
+    root_dir = codeai_project
+    with open(os.path.join(root_dir, 'app.py'), 'w', encoding='utf-8') as f:
+        f.write("print('versão 1')\n")
+    state = ProjectState(root_dir)
+
+    # Sem esperar a varredura periódica, o próximo comando já usa a configuração editada
+    config_path = os.path.join(root_dir, '.codeai', '.codeai_context')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = f.read()
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write(config.replace("ignorar:\n", "ignorar:\napp.py\n", 1))
+    future = time.time() + 10
+    os.utime(config_path, (future, future))
+
+    with open(state.handle('contexto'), 'r', encoding='utf-8') as f:
+        assert "versão 1" not in f.read()
+
+def test_daemon_output_follows_client_options(setup_daemon_project, monkeypatch, capsys):
+    root_dir = setup_daemon_project
+
+    def fake_create_context_file(*args):
+        log("prompt completo", DEBUG)
+        emit_event('envio', provedor='teste')
+        return 'contexto.md'
+    monkeypatch.setattr(daemon, 'create_context_file', fake_create_context_file)
+
+    # O cliente pede nível debug e eventos JSON; o daemon devolve a saída em vez de imprimi-la
+    with capture_output(DEBUG, True) as saida:
+        assert send_command(root_dir, 'contexto') == 'contexto.md'
+
+    assert ['texto', 'prompt completo'] in saida
+    assert ['evento', {'evento': 'envio', 'provedor': 'teste'}] in saida
+    assert "prompt completo" not in capsys.readouterr().out
@@ -0,0 +1,78 @@
+import os
+import time
+import pytest
+from codeai import directory_walker
+from codeai.directory_walker import DirectoryManifest, walk_directory
+
+@pytest.fixture
+def setup_tree(tmp_path):
+    """Cria uma árvore pequena com diretórios de mtime antigo."""
+    root_dir = str(tmp_path)
+    os.makedirs(os.path.join(root_dir, '.codeai'))
+    os.makedirs(os.path.join(root_dir, 'src', 'pkg'))
+    for path in ('a.txt', 'src/b.py', 'src/pkg/c.py'):
+        with open(os.path.join(root_dir, path), 'w') as f:
+            f.write(path)
+    old = time.time() - 3600
+    for dirpath in (root_dir, os.path.join(root_dir, 'src'), os.path.join(root_dir, 'src', 'pkg')):
+        os.utime(dirpath, (old, old))
+    return root_dir
+
+def _as_sets(walk):
+    """Converte a caminhada em um dicionário, ignorando o .codeai como fazem os padrões padrão."""
+    result = {}
+    for dirpath, dirnames, filenames in walk:
+        dirnames[:] = [d for d in dirnames if d != '.codeai']
+        result[dirpath] = (set(dirnames), set(filenames))
+    return result
+
+def test_walk_directory_matches_os_walk(setup_tree):
+    root_dir = setup_tree
+    assert _as_sets(walk_directory(root_dir)) == _as_sets(os.walk(root_dir))
+
+def test_manifest_replays_unchanged_directories(setup_tree, monkeypatch):
+    root_dir = setup_tree
+    manifest = DirectoryManifest(root_dir)
+    list(walk_directory(root_dir, manifest))
+    manifest.save()
+
+    scanned = []
+    original_scan = directory_walker._scan
+    monkeypatch.setattr(directory_walker, '_scan', lambda dirpath: scanned.append(dirpath) or original_scan(dirpath))
+
+    manifest = DirectoryManifest(root_dir)
+    assert _as_sets(walk_directory(root_dir, manifest)) == _as_sets(os.walk(root_dir))
+    assert scanned == []
+
+    # Um arquivo novo altera o mtime do diretório, que volta a ser listado
+    with open(os.path.join(root_dir, 'src', 'novo.py'), 'w') as f:
+        f.write("novo")
+    manifest = DirectoryManifest(root_dir)
+    result = _as_sets(walk_directory(root_dir, manifest))
+    assert scanned == [os.path.join(root_dir, 'src')]
+    assert 'novo.py' in result[os.path.join(root_dir, 'src')][1]
+
+def test_walk_directory_prunes_dirnames(setup_tree):
+    root_dir = setup_tree
+    visited = []
+    for dirpath, dirnames, _ in walk_directory(root_dir):
+        visited.append(dirpath)
+        dirnames[:] = [d for d in dirnames if d != 'src']
+    assert os.path.join(root_dir, 'src') not in visited
+
+def test_subtree_manifest_merges_back(setup_tree):
+    root_dir = setup_tree
+    manifest = DirectoryManifest(root_dir)
+    list(walk_directory(root_dir, manifest))
+    manifest.save()
+
+    manifest = DirectoryManifest(root_dir)
+    src_dir = os.path.join(root_dir, 'src')
+    subtree = manifest.for_subtree(src_dir)
+    assert set(subtree.entries) == {src_dir, os.path.join(src_dir, 'pkg')}
+
+    list(walk_directory(src_dir, subtree))
+    manifest.merge(subtree)
+    assert manifest.seen == {src_dir, os.path.join(src_dir, 'pkg')}
+    manifest.save()
+    assert set(DirectoryManifest(root_dir).entries) == {src_dir, os.path.join(src_dir, 'pkg')}
@@ -0,0 +1,84 @@
+import os
+import pytest
+from codeai import file_slices
+from codeai.file_slices import (
+    parse_slice,
+    parse_size,
+    read_head,
+    read_range,
+    read_tail,
+    read_excerpt,
+)
+
+@pytest.fixture
+def numbered_file(tmp_path):
+    """Cria um arquivo com 1000 linhas numeradas."""
+    path = tmp_path / 'app.log'
+    path.write_text("".join(f"linha {i}\n" for i in range(1, 1001)), encoding='utf-8')
+    return str(path)
+
+def test_parse_slice():
+    assert parse_slice("logs/app.log:-500") == ("logs/app.log", ('fim', 500))
+    assert parse_slice("schema.sql:1-200") == ("schema.sql", ('linhas', 1, 200))
+    assert parse_slice("README.md:+20") == ("README.md", ('inicio', 20))
+    assert parse_slice("src/") == ("src/", None)
+    assert parse_slice(r"C:\projeto\app.py") == (r"C:\projeto\app.py", None)
+    with pytest.raises(ValueError):
+        parse_slice("schema.sql:200-1")
+
+def test_parse_size():
+    assert parse_size("1000") == 1000
+    assert parse_size("256k") == 256 * 1024
+    assert parse_size(" 2MB ") == 2 * 1024 ** 2
+
+def test_read_head_and_range(numbered_file):
+    assert read_head(numbered_file, 2) == "linha 1\nlinha 2\n"
+    assert read_range(numbered_file, 10, 12) == "linha 10\nlinha 11\nlinha 12\n"
+
+def test_read_tail_across_blocks(numbered_file, monkeypatch):
+    monkeypatch.setattr(file_slices, 'BLOCO_LEITURA', 16)
+    assert read_tail(numbered_file, 3) == "linha 998\nlinha 999\nlinha 1000\n"
+    assert read_tail(numbered_file, 5000).count("\n") == 1000
+
+def test_read_tail_without_trailing_newline(tmp_path):
+    path = tmp_path / 'sem_quebra.txt'
+    path.write_text("a\nb\nc", encoding='utf-8')
+    assert read_tail(str(path), 2) == "b\nc"
+
+def test_read_excerpt_keeps_whole_lines(numbered_file):
+    size = os.path.getsize(numbered_file)
+    excerpt = read_excerpt(numbered_file, 200)
+
+    head, tail = excerpt.split("\n[... ")
+    assert head.startswith("linha 1\n") and head.endswith("\n")
+    assert tail.endswith("linha 1000\n")
+    omitted = int(tail.split(" bytes omitidos")[0])
+    assert 0 < omitted < size
+    assert len(excerpt.encode('utf-8')) < 300
+
+def test_read_excerpt_cuts_multibyte_characters(tmp_path):
+    path = tmp_path / 'minificado.json'
+    path.write_text("ç" * 1000, encoding='utf-8')
+    excerpt = read_excerpt(str(path), 101)
+    assert set(excerpt.replace("\n", "").split("[")[0]) == {"ç"}
+
+def test_slices_of_file_without_newlines_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_slices, 'BLOCO_LEITURA', 256)
+    path = tmp_path / 'dump.sql'
+    path.write_bytes(b"INSERT " * 200000)  # ~1.4 MB em uma única linha
+    limit = 1000
+
+    for text in (read_head(str(path), 10, limit), read_tail(str(path), 10, limit), read_range(str(path), 1, 5, limit)):
+        assert "trecho limitado a 1000 bytes" in text
+        assert len(text.encode('utf-8')) < limit + 100
+
+def test_read_range_skips_long_lines(tmp_path):
+    path = tmp_path / 'linhas_longas.txt'
+    path.write_bytes(b"a" * 300000 + b"\n" + b"segunda\n" + b"terceira\n")
+    assert read_range(str(path), 2, 3, 1000) == "segunda\nterceira\n"
+
+def test_read_tail_limit_keeps_whole_lines(numbered_file):
+    text = read_tail(numbered_file, 500, 100)
+    lines = text.splitlines()
+    assert "trecho limitado a 100 bytes" in lines[0]
+    assert lines[1].startswith("linha ") and lines[-1] == "linha 1000"
@@ -0,0 +1,106 @@
+import os
+import time
+import pytest
+from codeai.output import DEBUG, capture_output, log_response
+from codeai.hedging import (
+    ATRASO_PADRAO,
+    MIN_AMOSTRAS,
+    load_latencies,
+    record_latencies,
+    resolve_delay,
+    send_with_hedging,
+)
+
+CONVERSATION = [{"role": "user", "content": "Olá"}]
+
+def stub_providers(latencies, failures=()):
+    """Cria provedores locais que respondem após a latência configurada para cada modelo."""
+    calls = []
+
+    def get_sender(model):
+        def send(conversation):
+            calls.append(model)
+            time.sleep(latencies[model])
+            if model in failures:
+                raise ConnectionError("provedor indisponível")
+            return f"resposta de {model}"
+        return send
+
+    return get_sender, calls
+
+def test_primary_wins_without_hedge():
+    get_sender, calls = stub_providers({'principal': 0.01, 'alternativo': 0.01})
+    model, response, _ = send_with_hedging(CONVERSATION, ['principal', 'alternativo'], 0.5, get_sender)
+
+    assert (model, response) == ('principal', 'resposta de principal')
+    assert calls == ['principal']
+
+def test_slow_primary_triggers_hedge():
+    get_sender, calls = stub_providers({'principal': 2.0, 'alternativo': 0.05})
+    start = time.monotonic()
+    model, response, latencies = send_with_hedging(CONVERSATION, ['principal', 'alternativo'], 0.1, get_sender)
+
+    assert model == 'alternativo'
+    assert calls == ['principal', 'alternativo']
+    assert time.monotonic() - start < 1.0
+    assert latencies['alternativo'] < 1.0
+    # O principal lento também é medido, com pelo menos o atraso do hedge
+    assert 0.1 <= latencies['principal'] < 1.0
+
+def test_failed_primary_triggers_next_immediately():
+    get_sender, calls = stub_providers({'principal': 0.01, 'alternativo': 0.01}, failures={'principal'})
+    model, _, latencies = send_with_hedging(CONVERSATION, ['principal', 'alternativo'], 5.0, get_sender)
+
+    assert model == 'alternativo'
+    assert list(latencies) == ['alternativo']
+    assert latencies['alternativo'] < 1.0
+
+def test_provider_output_follows_caller_settings():
+    finished = []
+
+    def get_sender(model):
+        def send(conversation):
+            time.sleep(0.3 if model == 'principal' else 0.01)
+            log_response(model, f"resposta de {model}")
+            finished.append(model)
+            return f"resposta de {model}"
+        return send
+
+    with capture_output(DEBUG, True) as saida:
+        model, _, _ = send_with_hedging(CONVERSATION, ['principal', 'alternativo'], 0.05, get_sender)
+    while 'principal' not in finished:
+        time.sleep(0.01)
+
+    assert model == 'alternativo'
+    # Apenas a saída do vencedor chega a quem chamou; a do principal, concluído depois, é descartada
+    eventos = [conteudo for tipo, conteudo in saida if tipo == 'evento']
+    assert [(e['evento'], e['provedor']) for e in eventos] == [('resposta', 'alternativo')]
+    assert ['texto', "Resposta recebida de alternativo:"] in saida
+
+def test_all_failures_raise():
+    get_sender, _ = stub_providers({'a': 0.01, 'b': 0.01}, failures={'a', 'b'})
+    with pytest.raises(RuntimeError, match="Nenhum modelo respondeu"):
+        send_with_hedging(CONVERSATION, ['a', 'b'], 0.05, get_sender)
+
+def test_adaptive_delay_uses_p95(tmp_path):
+    root_dir = str(tmp_path)
+    os.makedirs(os.path.join(root_dir, '.codeai'))
+
+    assert resolve_delay(root_dir, 'gpt-4o-mini', 2) == 2.0
+    assert resolve_delay(root_dir, 'gpt-4o-mini', 'auto') == ATRASO_PADRAO
+
+    for seconds in range(1, 21):
+        record_latencies(root_dir, {'gpt-4o-mini': float(seconds)})
+    assert resolve_delay(root_dir, 'gpt-4o-mini', 'auto') == 19.0
+
+def test_adaptive_delay_does_not_shrink_after_hedges(tmp_path):
+    root_dir = str(tmp_path)
+    os.makedirs(os.path.join(root_dir, '.codeai'))
+    get_sender, _ = stub_providers({'principal': 0.5, 'alternativo': 0.01})
+
+    for _ in range(MIN_AMOSTRAS):
+        _, _, latencies = send_with_hedging(CONVERSATION, ['principal', 'alternativo'], 0.1, get_sender)
+        record_latencies(root_dir, latencies)
+
+    assert len(load_latencies(root_dir)['principal']) == MIN_AMOSTRAS
+    assert resolve_delay(root_dir, 'principal', 'auto') >= 0.1
@@ -0,0 +1,90 @@
+import json
+import pytest
+from click.testing import CliRunner
+from codeai.cli import main
+from codeai.output import (
+    SILENCIOSO,
+    RESUMO,
+    VERBOSO,
+    DEBUG,
+    configure_output,
+    log_request,
+    log_response,
+    preview,
+    log,
+    emit_event,
+    capture_output,
+    replay_output,
+)
+
+CONVERSATION = [
+    {"role": "system", "content": "Contexto adicional: " + "x" * 5000},
+    {"role": "user", "content": "Qual é a função principal?"},
+]
+
+@pytest.fixture(autouse=True)
+def reset_output():
+    """Restaura o nível padrão depois de cada teste."""
+    yield
+    configure_output(RESUMO, False)
+
+def test_preview_truncates():
+    assert preview("linha 1\nlinha 2") == "linha 1 linha 2"
+    assert len(preview("a" * 500)) == 80
+
+def test_summary_does_not_dump_prompt(capsys):
+    configure_output(RESUMO)
+    log_request("OpenAI", CONVERSATION)
+    out = capsys.readouterr().out
+    assert "2 mensagens" in out
+    assert "x" * 100 not in out
+
+def test_verbose_shows_previews_and_debug_full_prompt(capsys):
+    configure_output(VERBOSO)
+    log_request("OpenAI", CONVERSATION)
+    out = capsys.readouterr().out
+    assert "Qual é a função principal?" in out
+    assert "x" * 100 not in out
+
+    configure_output(DEBUG)
+    log_request("OpenAI", CONVERSATION)
+    assert "x" * 5000 in capsys.readouterr().out
+
+def test_silent_and_json_events(capsys):
+    configure_output(SILENCIOSO, json_events=True)
+    log_request("OpenAI", CONVERSATION)
+    log_response("OpenAI", "Resposta do modelo")
+    captured = capsys.readouterr()
+
+    events = [json.loads(line) for line in captured.out.splitlines()]
+    assert [e['evento'] for e in events] == ['envio', 'resposta']
+    assert events[0]['mensagens'] == 2
+    assert events[1]['previa'] == "Resposta do modelo"
+    assert captured.err == ""
+
+def test_capture_and_replay_output(capsys):
+    configure_output(RESUMO, False)
+    with capture_output(VERBOSO, True) as saida:
+        log("detalhe", VERBOSO)
+        log("ignorado", DEBUG)
+        emit_event('resposta', bytes=3)
+    assert capsys.readouterr().out == ""
+    assert saida == [['texto', 'detalhe'], ['evento', {'evento': 'resposta', 'bytes': 3}]]
+
+    configure_output(RESUMO, True)
+    replay_output(saida)
+    captured = capsys.readouterr()
+    assert json.loads(captured.out) == {'evento': 'resposta', 'bytes': 3}
+    assert captured.err == "detalhe\n"
+
+def test_cli_messages_follow_output_options(codeai_project, monkeypatch):
+    monkeypatch.chdir(codeai_project)
+
+    result = CliRunner().invoke(main, ['--eventos-json', 'compactar'])
+    assert result.exit_code == 0
+    assert [json.loads(line) for line in result.stdout.splitlines()] == [{'evento': 'compactacao', 'interacoes': []}]
+    assert "Nenhuma interação para compactar." in result.stderr
+
+    result = CliRunner().invoke(main, ['--silencioso', 'compactar'])
+    assert result.exit_code == 0
+    assert result.stdout == ""
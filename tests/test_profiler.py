@@ -0,0 +1,41 @@
+import os
+import pytest
+from click.testing import CliRunner
+from codeai import cli
+from codeai.cli import main
+
+@pytest.fixture
+def setup_project(codeai_project, monkeypatch):
+    """Cria um projeto com configuração e torna-o o diretório atual."""
+    root_dir = codeai_project
+    with open(os.path.join(root_dir, 'app.py'), 'w', encoding='utf-8') as f:
+        f.write("print('olá')\n")
+    monkeypatch.chdir(root_dir)
+    return root_dir
+
+def test_perfil_writes_reports(setup_project):
+    root_dir = setup_project
+    result = CliRunner().invoke(main, ['--perfil', 'contexto'])
+
+    assert result.exit_code == 0, result.output
+    perfil_dir = os.path.join(root_dir, '.codeai', 'perfil')
+    files = os.listdir(perfil_dir)
+    assert any(f.endswith('_contexto.pstats') for f in files)
+    assert any(f.endswith('_contexto_alocacoes.txt') for f in files)
+    assert "context_manager.create_context_file" in result.output
+
+def test_without_perfil_no_reports(setup_project):
+    root_dir = setup_project
+    result = CliRunner().invoke(main, ['contexto'])
+
+    assert result.exit_code == 0, result.output
+    assert not os.path.exists(os.path.join(root_dir, '.codeai', 'perfil'))
+
+def test_perfil_bypasses_daemon(setup_project, monkeypatch):
+    sent = []
+    monkeypatch.setattr(cli, 'send_command', lambda root_dir, comando: sent.append(comando) or '/daemon/contexto.md')
+    result = CliRunner().invoke(main, ['--perfil', 'contexto'])
+
+    assert result.exit_code == 0, result.output
+    assert sent == []
+    assert "context_manager.create_context_file" in result.output